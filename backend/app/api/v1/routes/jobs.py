@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session
 from app.db.session import get_session
 from app.db.models import Site
-from app.schemas.jobs import JobOut, JobRunRequest, JobRunResponse
-from app.services.scheduler import get_scheduler
-from app.services.jobs import validate_cron_expression, enqueue_run
+from app.schemas.jobs import (
+    JobBulkRunRequest,
+    JobBulkRunResponse,
+    JobOut,
+    JobRunRequest,
+    JobRunResponse,
+    LoadHistogram,
+    QueueStatus,
+    SchedulerStatus,
+    Timeline,
+)
+from app.services.dispatcher import get_dispatcher
+from app.services.scheduler import get_scheduler, tick_metrics
+from app.services.jobs import enqueue_run, enqueue_runs
+from app.services.run_queue import QueueFull, queue_stats
+from app.services.schedule import validate_cron_expression
+from app.services.timeline import get_schedule_index
 from app.core.security import require_admin_token
 
 router = APIRouter()
 
+MAX_TIMELINE_WINDOW = timedelta(days=31)
+
 
 @router.get("/", response_model=list[JobOut])
 def list_jobs():
@@ -27,12 +46,73 @@ def list_jobs():
     return jobs
 
 
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+@router.get("/queue", response_model=QueueStatus)
+def job_queue(session: Session = Depends(get_session)):
+    return queue_stats(session)
+
+
+@router.get("/scheduler", response_model=SchedulerStatus)
+def scheduler_status():
+    """Tick lag and skipped ticks, plus the run dispatcher's workers."""
+    dispatcher = get_dispatcher()
+    return {
+        "running": get_scheduler() is not None,
+        "tick": tick_metrics.snapshot(),
+        "dispatcher": dispatcher.stats() if dispatcher else None,
+    }
+
+
+@router.get("/load", response_model=LoadHistogram)
+def job_load(
+    hours: int = Query(24, ge=1, le=168),
+    bucket: int = Query(1, ge=1, le=1440, description="Bucket size in minutes"),
+    session: Session = Depends(get_session),
+):
+    """Scheduled fires per time bucket over the next ``hours``, after load spreading."""
+    start = datetime.now(timezone.utc)
+    return get_schedule_index(session).histogram(start, start + timedelta(hours=hours), bucket)
+
+
+@router.get("/timeline", response_model=Timeline)
+def job_timeline(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    bucket: Optional[int] = Query(None, ge=1, le=1440, description="Bucket size in minutes"),
+    limit: int = Query(1000, ge=1, le=10000),
+    session: Session = Depends(get_session),
+):
+    """Upcoming fires (or per-bucket counts) between ``from`` and ``to``; naive times are UTC."""
+    start = _as_utc(start) or datetime.now(timezone.utc)
+    end = _as_utc(end) or start + timedelta(hours=24)
+    if end <= start:
+        raise HTTPException(status_code=422, detail="'to' must be after 'from'")
+    if end - start > MAX_TIMELINE_WINDOW:
+        raise HTTPException(status_code=422, detail="Timeline window is limited to 31 days")
+    index = get_schedule_index(session)
+    if bucket:
+        return index.histogram(start, end, bucket)
+
+    fires = []
+    total = 0
+    for fire_time, entry in index.fires(start, end):
+        total += 1
+        if len(fires) < limit:
+            fires.append({"fire_time": fire_time, "site_id": entry.site_id, "site_name": entry.name})
+    return {"start": start, "end": end, "total": total, "fires": fires, "truncated": total > len(fires)}
+
+
 @router.post("/validate")
 def validate_job(payload: JobRunRequest, session: Session = Depends(get_session)):
     site = session.get(Site, payload.site_id)
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
-    error = validate_cron_expression(payload.cron or "")
+    error = validate_cron_expression(payload.cron or site.cron or "")
     if error:
         raise HTTPException(status_code=422, detail=error)
     return {"ok": True}
@@ -47,5 +127,27 @@ def run_job(payload: JobRunRequest, session: Session = Depends(get_session)):
         error = validate_cron_expression(payload.cron)
         if error:
             raise HTTPException(status_code=422, detail=error)
-    run = enqueue_run(payload.site_id)
-    return JobRunResponse(ok=True, run_id=run.id, status=run.status)
+    try:
+        admission = enqueue_run(payload.site_id, force=payload.force, session=session)
+    except QueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+    run = admission.run
+    return JobRunResponse(ok=True, run_id=run.id, status=run.status, coalesced=admission.coalesced)
+
+
+@router.post("/run-bulk", response_model=JobBulkRunResponse, dependencies=[Depends(require_admin_token)])
+def run_jobs_bulk(payload: JobBulkRunRequest, session: Session = Depends(get_session)):
+    sites, admission = enqueue_runs(
+        session,
+        site_ids=payload.site_ids,
+        enabled=payload.enabled,
+        plugin_key=payload.plugin_key,
+        force=payload.force,
+    )
+    return JobBulkRunResponse(
+        matched=len(sites),
+        enqueued=admission.enqueued,
+        coalesced=admission.coalesced,
+        rejected=admission.rejected,
+        dropped=admission.dropped,
+    )
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
-from app.db.session import get_session, engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import get_async_read_engine, get_async_read_session, get_session
 from app.db.models import LogEntry
 from app.schemas.logs import LogCreate, LogOut
+from app.services.archive import load_archived_run_async
 from app.services.config_store import serialize_config
+from app.services.transfer import export_stream
 import asyncio
 import json
 
@@ -29,12 +33,18 @@ def _log_out(entry: LogEntry) -> dict:
 
 
 @router.get("/", response_model=list[LogOut])
-def list_logs(session: Session = Depends(get_session), run_id: int | None = None, limit: int = 200):
+async def list_logs(session: AsyncSession = Depends(get_async_read_session), run_id: int | None = None, limit: int = 200):
     statement = select(LogEntry)
     if run_id is not None:
         statement = statement.where(LogEntry.run_id == run_id)
     statement = statement.order_by(LogEntry.id.desc()).limit(limit)
-    return list(reversed([LogOut(**_log_out(entry)) for entry in session.exec(statement).all()]))
+    entries = list(reversed((await session.exec(statement)).all()))
+    if not entries and run_id is not None:
+        # the run may have been moved to cold storage together with its logs
+        archived = await load_archived_run_async(session, run_id)
+        if archived:
+            entries = archived[1][-limit:] if limit > 0 else []
+    return [LogOut(**_log_out(entry)) for entry in entries]
 
 
 @router.post("/", response_model=LogOut, status_code=201)
@@ -49,36 +59,20 @@ def create_log(payload: LogCreate, session: Session = Depends(get_session)):
     return LogOut(**_log_out(log_entry))
 
 
-@router.get("/{log_id}", response_model=LogOut)
-def get_log(log_id: int, session: Session = Depends(get_session)):
-    log_entry = session.get(LogEntry, log_id)
-    if not log_entry:
-        raise HTTPException(status_code=404, detail="Log not found")
-    return LogOut(**_log_out(log_entry))
-
-
-@router.delete("/{log_id}", status_code=204)
-def delete_log(log_id: int, session: Session = Depends(get_session)):
-    log_entry = session.get(LogEntry, log_id)
-    if not log_entry:
-        raise HTTPException(status_code=404, detail="Log not found")
-    session.delete(log_entry)
-    session.commit()
-    return None
-
-
+# declared before /{log_id} so the path is not parsed as a log id
 @router.get("/stream")
 async def stream_logs(run_id: int | None = None, since_id: int | None = None, poll_interval: float = 1.5):
     async def event_generator():
         last_id = since_id or 0
         while True:
             await asyncio.sleep(poll_interval)
-            with Session(engine) as session:
+            # async session: polling never blocks the event loop other requests share
+            async with AsyncSession(get_async_read_engine()) as session:
                 statement = select(LogEntry).where(LogEntry.id > last_id)
                 if run_id is not None:
                     statement = statement.where(LogEntry.run_id == run_id)
                 statement = statement.order_by(LogEntry.id)
-                entries = session.exec(statement).all()
+                entries = (await session.exec(statement)).all()
             if entries:
                 for entry in entries:
                     last_id = entry.id
@@ -88,3 +82,41 @@ async def stream_logs(run_id: int | None = None, since_id: int | None = None, po
                 payload = {"type": "heartbeat", "last_id": last_id, "run_id": run_id}
                 yield f"data: {json.dumps(payload)}\n\n"
     return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
+@router.get("/export")
+async def export_logs(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    run_id: int | None = None,
+    level: str | None = None,
+    since: datetime | None = None,
+):
+    table = LogEntry.__table__
+    where = []
+    if run_id is not None:
+        where.append(table.c.run_id == run_id)
+    if level is not None:
+        where.append(table.c.level == level)
+    if since is not None:
+        where.append(table.c.created_at >= since)
+    body, media_type, headers = export_stream(get_async_read_engine(), "logs", table, format, gzip, where)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+@router.get("/{log_id}", response_model=LogOut)
+async def get_log(log_id: int, session: AsyncSession = Depends(get_async_read_session)):
+    log_entry = await session.get(LogEntry, log_id)
+    if not log_entry:
+        raise HTTPException(status_code=404, detail="Log not found")
+    return LogOut(**_log_out(log_entry))
+
+
+@router.delete("/{log_id}", status_code=204)
+def delete_log(log_id: int, session: Session = Depends(get_session)):
+    log_entry = session.get(LogEntry, log_id)
+    if not log_entry:
+        raise HTTPException(status_code=404, detail="Log not found")
+    session.delete(log_entry)
+    session.commit()
+    return None
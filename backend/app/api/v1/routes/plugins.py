@@ -1,6 +1,8 @@
 """Plugin registry endpoints."""
 from __future__ import annotations
 
+import time
+
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.core.security import require_admin_token
@@ -21,10 +23,15 @@ def list_registered_plugins():
 
 @router.post("/reload", response_model=PluginReloadResult)
 def reload_registered_plugins():
-    registry = reload_configured_plugins()
+    started = time.perf_counter()
+    report = reload_configured_plugins()
+    duration_ms = round((time.perf_counter() - started) * 1000, 3)
+    plugins = list_plugins()
     return {
-        "count": len(registry.list()),
-        "plugins": list_plugins(),
+        "count": len(plugins),
+        "plugins": plugins,
+        "modules": report,
+        "duration_ms": duration_ms,
     }
 
 
@@ -1,52 +1,239 @@
-from fastapi import APIRouter, Depends, HTTPException
+import re
+from datetime import datetime
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_
 from sqlmodel import Session, select
-from app.db.session import get_session
-from app.db.models import Run
-from app.schemas.runs import RunCreate, RunOut, RunUpdate
-from app.services.executor import QUEUED_STATUS
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import get_async_read_engine, get_async_read_session, get_session
+from app.db.models import Run, RunArtifact
+from app.schemas.runs import (
+    RunArtifactOut,
+    RunCreate,
+    RunFields,
+    RunOut,
+    RunQueuePosition,
+    RunTimingSummary,
+    RunUpdate,
+)
+from app.services.archive import load_archived_run_async
+from app.services.artifacts import delete_run_artifacts, read_artifact
+from app.services.result_data import load_result_data
+from app.services.run_queue import QueueFull, queue_position, submit_run
 from app.services.config_store import serialize_config, deserialize_config
+from app.services.timing import aggregate_timings, load_timings
+from app.services.transfer import export_stream
 from app.core.security import require_admin_token
 
 router = APIRouter()
 
 
+# decoders of the JSON text columns
+_DECODERS = {"plugin_config": deserialize_config, "timings": load_timings, "result_data": load_result_data}
+RUN_FIELDS = tuple(RunOut.model_fields)
+# list views leave out the potentially large plugin result unless asked for
+LIST_FIELDS = tuple(name for name in RUN_FIELDS if name != "result_data")
+
+
 def _run_out(run: Run) -> RunOut:
     data = run.dict()
-    data["plugin_config"] = deserialize_config(run.plugin_config)
+    for name, decode in _DECODERS.items():
+        data[name] = decode(data.get(name))
     return RunOut(**data)
 
 
-@router.get("/", response_model=list[RunOut])
-def list_runs(session: Session = Depends(get_session), site_id: int | None = None):
-    statement = select(Run)
+def _parse_fields(fields: str | None) -> list[str]:
+    if not fields:
+        return list(LIST_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if names == ["*"]:
+        return list(RUN_FIELDS)
+    unknown = sorted(set(names) - set(RUN_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown run fields: {', '.join(unknown)}; choose from {', '.join(RUN_FIELDS)}",
+        )
+    # the id is always included
+    return ["id"] + [name for name in dict.fromkeys(names) if name != "id"]
+
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Inclusive (start, end) of a single-range ``Range`` header; None serves the whole body.
+
+    Multiple ranges and malformed headers are ignored (answered with the full body), as
+    RFC 9110 allows. An unsatisfiable range raises 416.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+@router.get("/", response_model=list[RunFields], response_model_exclude_unset=True)
+async def list_runs(
+    session: AsyncSession = Depends(get_async_read_session),
+    site_id: int | None = None,
+    retry_of: int | None = None,
+    fields: str | None = Query(
+        default=None,
+        description="Comma-separated run fields to return (`*` for all); by default all but result_data",
+    ),
+):
+    names = _parse_fields(fields)
+    statement = select(*(getattr(Run, name) for name in names))
+    if site_id is not None:
+        statement = statement.where(Run.site_id == site_id)
+    if retry_of is not None:
+        statement = statement.where(or_(Run.id == retry_of, Run.retry_of == retry_of))
+    # only the selected columns are read
+    conn = await session.connection()
+    rows = await conn.execute(statement.order_by(Run.id.desc()))
+    items = []
+    for row in rows:
+        data = dict(row._mapping)
+        for name, decode in _DECODERS.items():
+            if name in data:
+                data[name] = decode(data[name])
+        items.append(RunFields(**data))
+    return items
+
+
+@router.get("/timings", response_model=RunTimingSummary)
+async def run_timings(
+    session: AsyncSession = Depends(get_async_read_session),
+    site_id: int | None = None,
+    plugin_key: str | None = None,
+    since: datetime | None = None,
+    limit: int = 5000,
+):
+    statement = select(Run.timings).where(Run.timings != None)  # noqa: E711
     if site_id is not None:
         statement = statement.where(Run.site_id == site_id)
-    runs = session.exec(statement.order_by(Run.id.desc())).all()
-    return [_run_out(run) for run in runs]
+    if plugin_key is not None:
+        statement = statement.where(Run.plugin_key == plugin_key)
+    if since is not None:
+        statement = statement.where(Run.created_at >= since)
+    statement = statement.order_by(Run.id.desc()).limit(limit)
+    return aggregate_timings((await session.exec(statement)).all())
+
+
+@router.get("/export")
+async def export_runs(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    site_id: int | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+):
+    """Stream runs still in the database (archived runs live in the archive segments)."""
+    table = Run.__table__
+    where = []
+    if site_id is not None:
+        where.append(table.c.site_id == site_id)
+    if status is not None:
+        where.append(table.c.status == status)
+    if since is not None:
+        where.append(table.c.created_at >= since)
+    body, media_type, headers = export_stream(get_async_read_engine(), "runs", table, format, gzip, where)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
 
 @router.post("/", response_model=RunOut, status_code=201)
-def create_run(payload: RunCreate, session: Session = Depends(get_session)):
+def create_run(payload: RunCreate, response: Response, session: Session = Depends(get_session)):
     data = payload.dict()
     data["plugin_config"] = serialize_config(data.get("plugin_config"))
-    run = Run(
-        site_id=payload.site_id,
-        status=QUEUED_STATUS,
-        plugin_key=payload.plugin_key,
-        plugin_config=data.get("plugin_config"),
-    )
-    session.add(run)
-    session.commit()
-    session.refresh(run)
-    return _run_out(run)
+    try:
+        admission = submit_run(
+            session,
+            payload.site_id,
+            force=payload.force,
+            plugin_key=payload.plugin_key,
+            plugin_config=data.get("plugin_config"),
+            source=payload.source,
+        )
+    except QueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+    if admission.coalesced:
+        response.status_code = 200
+    return _run_out(admission.run)
 
 
 @router.get("/{run_id}", response_model=RunOut)
-def get_run(run_id: int, session: Session = Depends(get_session)):
+async def get_run(run_id: int, session: AsyncSession = Depends(get_async_read_session)):
+    run = await session.get(Run, run_id)
+    if not run:
+        archived = await load_archived_run_async(session, run_id)
+        if not archived:
+            raise HTTPException(status_code=404, detail="Run not found")
+        run = archived[0]
+    return _run_out(run)
+
+
+@router.get("/{run_id}/artifacts", response_model=list[RunArtifactOut])
+async def list_run_artifacts(run_id: int, session: AsyncSession = Depends(get_async_read_session)):
+    statement = select(RunArtifact).where(RunArtifact.run_id == run_id).order_by(RunArtifact.id)
+    return (await session.exec(statement)).all()
+
+
+@router.get("/{run_id}/artifacts/{artifact_id}")
+async def download_run_artifact(
+    run_id: int,
+    artifact_id: int,
+    session: AsyncSession = Depends(get_async_read_session),
+    range_header: str | None = Header(default=None, alias="Range"),
+):
+    """Stream an artifact; a single ``Range: bytes=`` range is answered with 206."""
+    artifact = await session.get(RunArtifact, artifact_id)
+    if not artifact or artifact.run_id != run_id:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(artifact.name)}",
+        "ETag": f'"{artifact.sha256}"',
+    }
+    byte_range = _byte_range(range_header, artifact.size) if artifact.size else None
+    status_code = 200
+    start, end = 0, artifact.size - 1
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{artifact.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    try:
+        body = read_artifact(artifact, start, end)
+        # open the blob now so a missing file is a 404 rather than a broken stream
+        first = next(body, b"")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Artifact blob missing")
+
+    def chunks():
+        yield first
+        yield from body
+
+    return StreamingResponse(chunks(), status_code=status_code, media_type=artifact.content_type, headers=headers)
+
+
+@router.get("/{run_id}/position", response_model=RunQueuePosition)
+def get_run_position(run_id: int, session: Session = Depends(get_session)):
     run = session.get(Run, run_id)
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
-    return _run_out(run)
+    return queue_position(session, run)
 
 
 @router.patch("/{run_id}", response_model=RunOut)
@@ -70,6 +257,8 @@ def delete_run(run_id: int, session: Session = Depends(get_session)):
     run = session.get(Run, run_id)
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
+    delete_run_artifacts(session, [run_id])
     session.delete(run)
     session.commit()
+    # the blobs are removed by the hourly artifact GC job
     return None
@@ -1,43 +1,270 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Iterator
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlmodel import Session, select
-from app.db.session import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import get_async_read_engine, get_async_read_session, get_session
 from app.db.models import Site
-from app.schemas.sites import SiteCreate, SiteOut, SiteUpdate
+from app.schemas.sites import (
+    SiteBulkDelete,
+    SiteBulkResult,
+    SiteBulkUpdate,
+    SiteCreate,
+    SiteImportError,
+    SiteImportResult,
+    SiteOut,
+    SiteUpdate,
+)
 from app.services.config_store import serialize_config, deserialize_config
+from app.services.schedule import extract_cron, normalize_cron, validate_cron_expression
+from app.services.hooks import log_event
+from app.services.site_changes import record_site_change
+from app.services.transfer import export_stream, iter_lines, iter_records
 from app.core.security import require_admin_token
 from datetime import datetime
 
 router = APIRouter()
 
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_ERRORS = 1000
+
+
+def _apply_cron(data: dict, previous_notes: str | None = None) -> None:
+    """Normalize and validate the cron field.
+
+    Without an explicit ``cron``, adding/editing/removing the legacy ``cron:`` line in notes
+    still (un)schedules the site.
+    """
+    if "cron" in data:
+        data["cron"] = normalize_cron(data["cron"])
+    elif "notes" in data:
+        notes_cron = extract_cron(data["notes"])
+        if notes_cron or extract_cron(previous_notes):
+            data["cron"] = normalize_cron(notes_cron)
+    if data.get("cron"):
+        error = validate_cron_expression(data["cron"])
+        if error:
+            raise HTTPException(status_code=422, detail=f"Invalid cron: {error}")
+
+
+def _apply_retry_policy(data: dict) -> None:
+    if "retry_policy" in data:
+        overrides = {key: value for key, value in (data["retry_policy"] or {}).items() if value is not None}
+        data["retry_policy"] = serialize_config(overrides) if overrides else None
+
+
+def _site_data(payload: SiteCreate | SiteUpdate, previous_notes: str | None = None) -> dict:
+    """Column values for the fields set in ``payload``."""
+    data = payload.dict(exclude_unset=True)
+    if data.get("url") is not None:
+        data["url"] = str(data["url"])
+    _apply_cron(data, previous_notes)
+    _apply_retry_policy(data)
+    if "plugin_config" in data:
+        data["plugin_config"] = serialize_config(data.get("plugin_config"))
+    return data
+
 
 def _site_out(site: Site) -> SiteOut:
     data = site.dict()
     data["plugin_config"] = deserialize_config(site.plugin_config)
+    data["retry_policy"] = deserialize_config(site.retry_policy)
     return SiteOut(**data)
 
 
 @router.get("/", response_model=list[SiteOut])
-def list_sites(session: Session = Depends(get_session)):
-    sites = session.exec(select(Site).order_by(Site.id)).all()
+async def list_sites(session: AsyncSession = Depends(get_async_read_session)):
+    sites = (await session.exec(select(Site).order_by(Site.id))).all()
     return [_site_out(site) for site in sites]
 
 
 @router.post("/", response_model=SiteOut, status_code=201)
 def create_site(payload: SiteCreate, session: Session = Depends(get_session)):
-    data = payload.dict()
-    if data.get("url") is not None:
-        data["url"] = str(data["url"])
-    data["plugin_config"] = serialize_config(data.get("plugin_config"))
+    data = _site_data(payload)
     site = Site(**data)
     session.add(site)
+    session.flush()
+    record_site_change(session, site.id)
     session.commit()
     session.refresh(site)
     return _site_out(site)
 
 
+def _load_sites(session: Session, site_ids: list[int]) -> tuple[list[Site], list[int]]:
+    sites = list(session.exec(select(Site).where(Site.id.in_(site_ids)).order_by(Site.id)).all())
+    found = {site.id for site in sites}
+    return sites, sorted(set(site_ids) - found)
+
+
+@router.patch("/bulk", response_model=SiteBulkResult)
+def update_sites(payload: SiteBulkUpdate, session: Session = Depends(get_session)):
+    """Apply the same changes to many sites in one transaction."""
+    sites, missing = _load_sites(session, payload.site_ids)
+    changes = payload.changes.dict(exclude_unset=True)
+    if changes.get("url") is not None:
+        changes["url"] = str(changes["url"])
+    _apply_retry_policy(changes)
+    if "plugin_config" in changes:
+        changes["plugin_config"] = serialize_config(changes.get("plugin_config"))
+    now = datetime.utcnow()
+    for site in sites:
+        data = dict(changes)
+        _apply_cron(data, site.notes)
+        for key, value in data.items():
+            setattr(site, key, value)
+        site.updated_at = now
+        session.add(site)
+        record_site_change(session, site.id)
+    site_ids = [site.id for site in sites]
+    if sites:
+        log_event(
+            session,
+            f"Updated {len(sites)} site(s): {', '.join(sorted(changes))}",
+            event="site.bulk_updated",
+            payload={"site_ids": site_ids, "fields": sorted(changes)},
+        )
+    session.commit()
+    return SiteBulkResult(site_ids=site_ids, missing=missing)
+
+
+@router.post("/bulk-delete", response_model=SiteBulkResult, dependencies=[Depends(require_admin_token)])
+def delete_sites(payload: SiteBulkDelete, session: Session = Depends(get_session)):
+    """Delete many sites in one transaction."""
+    sites, missing = _load_sites(session, payload.site_ids)
+    site_ids = [site.id for site in sites]
+    for site in sites:
+        session.delete(site)
+        record_site_change(session, site.id)
+    if sites:
+        log_event(
+            session,
+            f"Deleted {len(sites)} site(s)",
+            level="warning",
+            event="site.bulk_deleted",
+            payload={"site_ids": site_ids, "names": [site.name for site in sites]},
+        )
+    session.commit()
+    return SiteBulkResult(site_ids=site_ids, missing=missing)
+
+
+@router.get("/export")
+async def export_sites(format: str = Query("ndjson", pattern="^(ndjson|csv)$"), gzip: bool = False):
+    body, media_type, headers = export_stream(get_async_read_engine(), "sites", Site.__table__, format, gzip)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+
+def _url_key(url: object) -> str:
+    # validated URLs gain a trailing slash
+    return str(url).rstrip("/")
+
+
+def _import_row(session: Session, record: dict, by_name: dict, by_url: dict) -> tuple[Site, bool]:
+    """Write one import row inside a savepoint, so a failing row rolls back alone."""
+    site_id = by_name.get(record.get("name")) or by_url.get(_url_key(record.get("url")))
+    site = session.get(Site, site_id) if site_id else None
+    if site:
+        data = _site_data(SiteUpdate(**record), site.notes)
+    else:
+        data = _site_data(SiteCreate(**record))
+    with session.begin_nested():
+        if site:
+            for key, value in data.items():
+                setattr(site, key, value)
+            site.updated_at = datetime.utcnow()
+        else:
+            site = Site(**data)
+        session.add(site)
+        session.flush()
+        record_site_change(session, site.id)
+        session.flush()
+    return site, site_id is None
+
+
+def _import_sites(session: Session, records: Iterator) -> SiteImportResult:
+    """Upsert parsed rows: a row updates the site with the same name, else the same URL."""
+    by_name: dict[str, int] = {}
+    by_url: dict[str, int] = {}
+    for site_id, name, url in session.exec(select(Site.id, Site.name, Site.url)):
+        by_name.setdefault(name, site_id)
+        by_url.setdefault(_url_key(url), site_id)
+    created = updated = failed = pending = 0
+    errors: list[SiteImportError] = []
+    for number, record, error in records:
+        if error is None:
+            try:
+                site, is_new = _import_row(session, record, by_name, by_url)
+            except ValidationError as exc:
+                error = _validation_message(exc)
+            except HTTPException as exc:
+                error = str(exc.detail)
+            except Exception as exc:  # noqa: BLE001 - one bad row must not abort the stream
+                # database errors carry the statement; the driver message is enough here
+                error = f"{type(exc).__name__}: {getattr(exc, 'orig', None) or exc}"
+        if error is not None:
+            failed += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                name = record.get("name") if record else None
+                errors.append(SiteImportError(row=number, name=name if isinstance(name, str) else None, error=error))
+            continue
+        if is_new:
+            created += 1
+        else:
+            updated += 1
+        by_name[site.name] = site.id
+        by_url[_url_key(site.url)] = site.id
+        pending += 1
+        if pending >= IMPORT_BATCH_SIZE:
+            session.commit()
+            # keep only the id maps between batches
+            session.expunge_all()
+            pending = 0
+    result = SiteImportResult(
+        created=created, updated=updated, failed=failed, errors=errors, errors_truncated=failed > len(errors)
+    )
+    log_event(
+        session,
+        f"Imported sites: {created} created, {updated} updated, {failed} failed",
+        level="warning" if failed else "info",
+        event="site.imported",
+        payload={"created": created, "updated": updated, "failed": failed},
+    )
+    return result
+
+
+@router.post("/import", response_model=SiteImportResult, dependencies=[Depends(require_admin_token)])
+async def import_sites(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    session: Session = Depends(get_session),
+):
+    """Stream NDJSON or CSV rows (optionally gzipped) into the sites table.
+
+    The body is parsed while it arrives and rows are committed in batches, so large files
+    are never held in memory. Rows that fail validation are reported and skipped.
+    """
+    chunks = request.stream()
+
+    def body():
+        # runs in the worker thread; each chunk is awaited on the event loop
+        while True:
+            try:
+                yield anyio.from_thread.run(chunks.__anext__)
+            except StopAsyncIteration:
+                return
+
+    return await run_in_threadpool(_import_sites, session, iter_records(iter_lines(body()), format))
+
+
 @router.get("/{site_id}", response_model=SiteOut)
-def get_site(site_id: int, session: Session = Depends(get_session)):
-    site = session.get(Site, site_id)
+async def get_site(site_id: int, session: AsyncSession = Depends(get_async_read_session)):
+    site = await session.get(Site, site_id)
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
     return _site_out(site)
@@ -48,13 +275,12 @@ def update_site(site_id: int, payload: SiteUpdate, session: Session = Depends(ge
     site = session.get(Site, site_id)
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
-    data = payload.dict(exclude_unset=True)
-    if "plugin_config" in data:
-        data["plugin_config"] = serialize_config(data.get("plugin_config"))
+    data = _site_data(payload, site.notes)
     for key, value in data.items():
         setattr(site, key, value)
     site.updated_at = datetime.utcnow()
     session.add(site)
+    record_site_change(session, site.id)
     session.commit()
     session.refresh(site)
     return _site_out(site)
@@ -66,5 +292,6 @@ def delete_site(site_id: int, session: Session = Depends(get_session)):
     if not site:
         raise HTTPException(status_code=404, detail="Site not found")
     session.delete(site)
+    record_site_change(session, site_id)
     session.commit()
     return None
@@ -0,0 +1,57 @@
+from typing import Dict
+from fastapi import APIRouter, Depends
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import get_async_read_session
+from app.db.models import RunStats, Site
+from app.schemas.stats import PluginRunStats, RunCounters, SiteRunStats, StatsSummary
+from app.services.stats import COUNTER_COLUMNS, DURATION_BUCKETS, SCOPE_PLUGIN, SCOPE_SITE
+
+router = APIRouter()
+
+
+def _counters(row: RunStats) -> Dict[str, object]:
+    attempted = row.success + row.failed
+    return {
+        "total": row.total,
+        "success": row.success,
+        "failed": row.failed,
+        "skipped": row.skipped,
+        "success_rate": round(row.success / attempted, 4) if attempted else None,
+        "streak": row.streak,
+        "best_streak": row.best_streak,
+        "last_run_at": row.last_run_at,
+        "last_success_at": row.last_success_at,
+        "last_failure_at": row.last_failure_at,
+        "avg_duration_ms": round(row.duration_total_ms / row.duration_count, 1) if row.duration_count else None,
+        "durations": {column: getattr(row, column) for column in DURATION_BUCKETS},
+    }
+
+
+@router.get("/", response_model=StatsSummary)
+async def get_stats(session: AsyncSession = Depends(get_async_read_session)):
+    """Counters per site and plugin, maintained as runs finish (no scan of the run table)."""
+    rows = (await session.exec(select(RunStats))).all()
+    sites = (await session.exec(select(Site).order_by(Site.id))).all()
+    by_site = {row.key: row for row in rows if row.scope == SCOPE_SITE}
+    empty = RunStats(scope=SCOPE_SITE, key="")
+    totals = RunStats(scope=SCOPE_SITE, key="")
+    site_stats = []
+    for site in sites:
+        row = by_site.get(str(site.id), empty)
+        site_stats.append(SiteRunStats(site_id=site.id, site_name=site.name, enabled=site.enabled, **_counters(row)))
+        for column in ("total", *COUNTER_COLUMNS):
+            setattr(totals, column, getattr(totals, column) + getattr(row, column))
+        for column in ("last_run_at", "last_success_at", "last_failure_at"):
+            value = getattr(row, column)
+            if value and (getattr(totals, column) is None or value > getattr(totals, column)):
+                setattr(totals, column, value)
+    plugin_stats = [
+        PluginRunStats(plugin_key=row.key, **_counters(row))
+        for row in sorted(rows, key=lambda item: item.key)
+        if row.scope == SCOPE_PLUGIN
+    ]
+    summary = _counters(totals)
+    # streaks only make sense per site or plugin
+    summary.update(streak=0, best_streak=0)
+    return StatsSummary(totals=RunCounters(**summary), sites=site_stats, plugins=plugin_stats)
@@ -17,9 +17,41 @@ class Settings(BaseModel):
     cookiecloud_verify_ssl: bool = True
     cookiecloud_send_json: bool = True
     scheduler_enabled: bool = True
+    execution_enabled: bool = True
     api_token: str = ""
     plugin_paths: str = "app.plugins"
     admin_token: str = ""
+    batch_max_size: int = 10
+    batch_max_wait_seconds: float = 0
+    schedule_spread_minutes: int = 0
+    queue_coalesce: bool = True
+    queue_max_depth: int = 0
+    queue_overflow_policy: str = "reject"
+    catchup_grace_minutes: int = 60
+    catchup_spread_seconds: int = 300
+    executor_concurrency: int = 1
+    dispatch_poll_seconds: float = 2.0
+    leader_lease_seconds: float = 30.0
+    leader_renew_seconds: float = 10.0
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_mb: int = 64
+    sqlite_mmap_size_mb: int = 256
+    sqlite_temp_store: str = "memory"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    archive_after_days: int = 30
+    # empty: "archive" next to the database file
+    archive_dir: str = ""
+    archive_batch_size: int = 500
+    result_data_max_bytes: int = 16384
+    result_data_max_string: int = 2048
+    result_data_compress_bytes: int = 1024
+    # empty: "artifacts" next to the database file
+    artifact_dir: str = ""
+    artifact_max_bytes: int = 5 * 1024 * 1024
+    artifact_compress: bool = True
 
     class Config:
         frozen = True
@@ -27,6 +59,13 @@ class Settings(BaseModel):
     def get_cookiecloud_uuid(self) -> str | None:
         return self.cookiecloud_uuid or self.cookiecloud_key
 
+    @property
+    def data_dir(self) -> str:
+        """Directory of the SQLite file; default home of the archive and artifact stores."""
+        if not self.database_url.startswith("sqlite:///") or ":memory:" in self.database_url:
+            return "./data"
+        return os.path.dirname(self.database_url.replace("sqlite:///", "")) or "."
+
     @property
     def masked(self) -> dict:
         def mask(value: str) -> str:
@@ -49,9 +88,39 @@ class Settings(BaseModel):
             "cookiecloud_verify_ssl": self.cookiecloud_verify_ssl,
             "cookiecloud_send_json": self.cookiecloud_send_json,
             "scheduler_enabled": self.scheduler_enabled,
+            "execution_enabled": self.execution_enabled,
             "api_token": mask(self.api_token),
             "plugin_paths": self.plugin_paths,
             "admin_token": mask(self.admin_token),
+            "batch_max_size": self.batch_max_size,
+            "batch_max_wait_seconds": self.batch_max_wait_seconds,
+            "schedule_spread_minutes": self.schedule_spread_minutes,
+            "queue_coalesce": self.queue_coalesce,
+            "queue_max_depth": self.queue_max_depth,
+            "queue_overflow_policy": self.queue_overflow_policy,
+            "catchup_grace_minutes": self.catchup_grace_minutes,
+            "catchup_spread_seconds": self.catchup_spread_seconds,
+            "executor_concurrency": self.executor_concurrency,
+            "dispatch_poll_seconds": self.dispatch_poll_seconds,
+            "leader_lease_seconds": self.leader_lease_seconds,
+            "leader_renew_seconds": self.leader_renew_seconds,
+            "sqlite_journal_mode": self.sqlite_journal_mode,
+            "sqlite_synchronous": self.sqlite_synchronous,
+            "sqlite_busy_timeout_ms": self.sqlite_busy_timeout_ms,
+            "sqlite_cache_size_mb": self.sqlite_cache_size_mb,
+            "sqlite_mmap_size_mb": self.sqlite_mmap_size_mb,
+            "sqlite_temp_store": self.sqlite_temp_store,
+            "db_pool_size": self.db_pool_size,
+            "db_max_overflow": self.db_max_overflow,
+            "archive_after_days": self.archive_after_days,
+            "archive_dir": self.archive_dir,
+            "archive_batch_size": self.archive_batch_size,
+            "result_data_max_bytes": self.result_data_max_bytes,
+            "result_data_max_string": self.result_data_max_string,
+            "result_data_compress_bytes": self.result_data_compress_bytes,
+            "artifact_dir": self.artifact_dir,
+            "artifact_max_bytes": self.artifact_max_bytes,
+            "artifact_compress": self.artifact_compress,
         }
 
 
@@ -70,7 +139,37 @@ def get_settings() -> Settings:
         cookiecloud_verify_ssl=os.getenv("COOKIECLOUD_VERIFY_SSL", "true").lower() != "false",
         cookiecloud_send_json=os.getenv("COOKIECLOUD_SEND_JSON", "true").lower() != "false",
         scheduler_enabled=os.getenv("SCHEDULER_ENABLED", "true").lower() != "false",
+        execution_enabled=os.getenv("EXECUTION_ENABLED", "true").lower() != "false",
         api_token=os.getenv("API_TOKEN", ""),
         plugin_paths=os.getenv("PLUGIN_PATHS", "app.plugins"),
         admin_token=os.getenv("ADMIN_TOKEN", ""),
+        batch_max_size=int(os.getenv("BATCH_MAX_SIZE", "10")),
+        batch_max_wait_seconds=float(os.getenv("BATCH_MAX_WAIT_SECONDS", "0")),
+        schedule_spread_minutes=int(os.getenv("SCHEDULE_SPREAD_MINUTES", "0")),
+        queue_coalesce=os.getenv("QUEUE_COALESCE", "true").lower() != "false",
+        queue_max_depth=int(os.getenv("QUEUE_MAX_DEPTH", "0")),
+        queue_overflow_policy=os.getenv("QUEUE_OVERFLOW_POLICY", "reject").strip().lower(),
+        catchup_grace_minutes=int(os.getenv("CATCHUP_GRACE_MINUTES", "60")),
+        catchup_spread_seconds=int(os.getenv("CATCHUP_SPREAD_SECONDS", "300")),
+        executor_concurrency=int(os.getenv("EXECUTOR_CONCURRENCY", "1")),
+        dispatch_poll_seconds=float(os.getenv("DISPATCH_POLL_SECONDS", "2")),
+        leader_lease_seconds=float(os.getenv("LEADER_LEASE_SECONDS", "30")),
+        leader_renew_seconds=float(os.getenv("LEADER_RENEW_SECONDS", "10")),
+        sqlite_journal_mode=os.getenv("SQLITE_JOURNAL_MODE", "wal").strip().lower(),
+        sqlite_synchronous=os.getenv("SQLITE_SYNCHRONOUS", "normal").strip().lower(),
+        sqlite_busy_timeout_ms=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        sqlite_cache_size_mb=int(os.getenv("SQLITE_CACHE_SIZE_MB", "64")),
+        sqlite_mmap_size_mb=int(os.getenv("SQLITE_MMAP_SIZE_MB", "256")),
+        sqlite_temp_store=os.getenv("SQLITE_TEMP_STORE", "memory").strip().lower(),
+        db_pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        archive_after_days=int(os.getenv("ARCHIVE_AFTER_DAYS", "30")),
+        archive_dir=os.getenv("ARCHIVE_DIR", ""),
+        archive_batch_size=int(os.getenv("ARCHIVE_BATCH_SIZE", "500")),
+        result_data_max_bytes=int(os.getenv("RESULT_DATA_MAX_BYTES", "16384")),
+        result_data_max_string=int(os.getenv("RESULT_DATA_MAX_STRING", "2048")),
+        result_data_compress_bytes=int(os.getenv("RESULT_DATA_COMPRESS_BYTES", "1024")),
+        artifact_dir=os.getenv("ARTIFACT_DIR", ""),
+        artifact_max_bytes=int(os.getenv("ARTIFACT_MAX_BYTES", str(5 * 1024 * 1024))),
+        artifact_compress=os.getenv("ARTIFACT_COMPRESS", "true").lower() == "true",
     )
@@ -0,0 +1,113 @@
+"""Engine factory with the SQLite tuning profile.
+
+Every new SQLite connection gets the configured pragmas: WAL lets readers (API, SSE
+poller) proceed while a writer commits, ``busy_timeout`` makes a second writer wait
+instead of failing with "database is locked", and ``synchronous=NORMAL`` is durable
+across application crashes in WAL mode while skipping an fsync per commit.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import create_engine
+
+from app.core.config import Settings, get_settings
+
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SYNCHRONOUS_LEVELS = ("off", "normal", "full", "extra")
+TEMP_STORES = ("default", "file", "memory")
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def is_memory(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def sqlite_pragmas(settings: Settings, read_only: bool = False) -> Dict[str, object]:
+    """Pragmas for a new connection; unset (empty/0) values keep SQLite's default."""
+    pragmas: Dict[str, object] = {}
+    # journal_mode is persistent and changes the file header, so only writers set it
+    if settings.sqlite_journal_mode in JOURNAL_MODES and not read_only:
+        pragmas["journal_mode"] = settings.sqlite_journal_mode
+    if settings.sqlite_synchronous in SYNCHRONOUS_LEVELS:
+        pragmas["synchronous"] = settings.sqlite_synchronous
+    if settings.sqlite_busy_timeout_ms > 0:
+        pragmas["busy_timeout"] = settings.sqlite_busy_timeout_ms
+    if settings.sqlite_cache_size_mb > 0:
+        # negative cache_size is in KiB rather than pages
+        pragmas["cache_size"] = -settings.sqlite_cache_size_mb * 1024
+    if settings.sqlite_mmap_size_mb > 0:
+        pragmas["mmap_size"] = settings.sqlite_mmap_size_mb * 1024 * 1024
+    if settings.sqlite_temp_store in TEMP_STORES:
+        pragmas["temp_store"] = settings.sqlite_temp_store
+    if read_only:
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+
+def create_db_engine(url: str, settings: Optional[Settings] = None, read_only: bool = False) -> Engine:
+    """Engine for ``url``; SQLite URLs get the pragma profile and a thread-shared pool."""
+    settings = settings or get_settings()
+    if not is_sqlite(url):
+        return create_engine(url, echo=False, pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+
+    connect_args = {"check_same_thread": False}
+    if settings.sqlite_busy_timeout_ms > 0:
+        connect_args["timeout"] = settings.sqlite_busy_timeout_ms / 1000
+    kwargs = {}
+    if not is_memory(url):
+        kwargs = {"pool_size": settings.db_pool_size, "max_overflow": settings.db_max_overflow}
+    engine = create_engine(url, echo=False, connect_args=connect_args, **kwargs)
+    _install_pragmas(engine, sqlite_pragmas(settings, read_only=read_only))
+    return engine
+
+
+def async_url(url: str) -> str:
+    """``sqlite:///...`` -> ``sqlite+aiosqlite:///...``; URLs naming a driver are kept."""
+    scheme, _, rest = url.partition(":")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite:{rest}"
+    return url
+
+
+def create_async_db_engine(url: str, settings: Optional[Settings] = None, read_only: bool = False) -> AsyncEngine:
+    """Async counterpart of ``create_db_engine`` (aiosqlite for SQLite) with the same pragmas."""
+    settings = settings or get_settings()
+    url = async_url(url)
+    if not is_sqlite(url):
+        return create_async_engine(url, echo=False, pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+
+    connect_args = {}
+    if settings.sqlite_busy_timeout_ms > 0:
+        connect_args["timeout"] = settings.sqlite_busy_timeout_ms / 1000
+    engine = create_async_engine(
+        url,
+        echo=False,
+        connect_args=connect_args,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+    )
+    _install_pragmas(engine.sync_engine, sqlite_pragmas(settings, read_only=read_only))
+    return engine
+
+
+def _install_pragmas(engine: Engine, pragmas: Dict[str, object]) -> None:
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
@@ -12,12 +13,30 @@ class Site(SQLModel, table=True):
     cookiecloud_uuid: Optional[str] = None
     plugin_key: Optional[str] = None
     plugin_config: Optional[str] = Field(default=None, sa_column_kwargs={"nullable": True})
+    cron: Optional[str] = Field(default=None, index=True)
+    # fire anywhere within this many minutes after the cron time (None: SCHEDULE_SPREAD_MINUTES)
+    spread_minutes: Optional[int] = None
+    # JSON overrides of the plugin's RetryPolicy fields
+    retry_policy: Optional[str] = Field(default=None, sa_column_kwargs={"nullable": True})
+    # last cron fire that enqueued (or caught up) a run, naive UTC
+    last_fired_at: Optional[datetime] = None
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class Run(SQLModel, table=True):
+    __table_args__ = (
+        # latest successful run per site (idempotency window lookup)
+        Index("ix_run_site_status_finished", "site_id", "status", "finished_at"),
+        # claim order: priority, then weighted-fair tag (see services/run_queue.py)
+        Index("ix_run_claim", "status", "priority", "queue_tag", "id"),
+        Index("ix_run_status_tag", "status", "queue_tag"),
+        Index("ix_run_flow_tag", "status", "queue_flow", "queue_tag"),
+        # ids are never reused, so a new run cannot take the id of an archived one
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     site_id: int = Field(foreign_key="site.id")
     status: str = "queued"
@@ -26,9 +45,99 @@ class Run(SQLModel, table=True):
     error: Optional[str] = None
     plugin_key: Optional[str] = None
     plugin_config: Optional[str] = Field(default=None, sa_column_kwargs={"nullable": True})
+    force: bool = False
+    # repeat enqueues folded into this run while it was queued
+    coalesced_count: int = 0
+    # manual / scheduled / retry; lower priority values are claimed first
+    source: Optional[str] = None
+    priority: int = 1
+    # fair-queuing flow (plugin key) and virtual finish tag within it
+    queue_flow: Optional[str] = None
+    queue_tag: float = 0.0
+    # retries: attempt number, first run of the chain and earliest claim time
+    attempt: int = 1
+    retry_of: Optional[int] = Field(default=None, index=True)
+    not_before: Optional[datetime] = None
+    # compact JSON of per-phase durations (ms), cpu (ms) and rss_kb, see services/timing.py
+    timings: Optional[str] = Field(default=None, sa_column_kwargs={"nullable": True})
+    # PluginResult.data as capped JSON, zlib-compressed when large, see services/result_data.py
+    result_data: Optional[str] = Field(default=None, sa_column_kwargs={"nullable": True})
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class SiteChange(SQLModel, table=True):
+    """Append-only feed of site create/update/delete events (consumed by the scheduler)."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    site_id: int = Field(index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ArchivedRun(SQLModel, table=True):
+    """Where an archived run (and its logs) lives in the segment files (services/archive.py)."""
+
+    run_id: int = Field(primary_key=True)
+    site_id: int = Field(index=True)
+    # segment name, e.g. "runs-2026-01"
+    segment: str
+    # byte range of the gzip member holding the run
+    offset: int
+    length: int
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RunArtifact(SQLModel, table=True):
+    """A blob a plugin kept with a run; the bytes live in the artifact store (services/artifacts.py)."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    run_id: int = Field(index=True)
+    name: str
+    content_type: str = "application/octet-stream"
+    # content address of the original bytes; shared by identical artifacts
+    sha256: str = Field(index=True)
+    size: int
+    # stored gzipped
+    compressed: bool = False
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Lease(SQLModel, table=True):
+    """Time-limited lock held by one process (e.g. the scheduler leader)."""
+
+    name: str = Field(primary_key=True)
+    holder: str
+    acquired_at: datetime
+    renewed_at: datetime
+    expires_at: datetime
+
+
+class RunStats(SQLModel, table=True):
+    """Run counters per site or plugin, updated with each finished run (services/stats.py)."""
+
+    # "site" (key is the site id) or "plugin" (key is the plugin key)
+    scope: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    total: int = 0
+    success: int = 0
+    failed: int = 0
+    skipped: int = 0
+    # consecutive successes (> 0) or failures (< 0) ending with the latest run
+    streak: int = 0
+    best_streak: int = 0
+    last_run_at: Optional[datetime] = None
+    last_success_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+    # run durations (started_at to finished_at): sum and buckets, see stats.DURATION_BUCKETS
+    duration_count: int = 0
+    duration_total_ms: float = 0.0
+    le_1s: int = 0
+    le_5s: int = 0
+    le_30s: int = 0
+    le_2m: int = 0
+    le_10m: int = 0
+    gt_10m: int = 0
+
+
 class LogEntry(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     run_id: Optional[int] = Field(default=None, foreign_key="run.id")
@@ -1,18 +1,27 @@
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import inspect
+from sqlmodel import SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import get_settings
-from app.db.models import Site, Run, LogEntry
-from app.migrations import migrate_logs_payload
+from app.db.engine import create_async_db_engine, create_db_engine, is_memory
+from app.db.models import Site, Run, LogEntry, SiteChange, Lease, ArchivedRun
+from app.migrations import run_migrations
 
 settings = get_settings()
-engine = create_engine(settings.database_url, echo=False)
+engine = create_db_engine(settings.database_url)
+# separate query_only pool for heavy read endpoints, so list/stream traffic neither writes
+# by accident nor holds connections the executors need
+read_engine = engine if is_memory(settings.database_url) else create_db_engine(settings.database_url, read_only=True)
+# async read path (aiosqlite) for read routes and SSE; created on first use
+_async_read_engine = None
 
 
 def init_db():
+    # tables created from the current models need none of the migrations
+    fresh = not inspect(engine).has_table(Site.__tablename__)
     SQLModel.metadata.create_all(engine)
     if settings.database_url.startswith("sqlite:///"):
         db_path = settings.database_url.replace("sqlite:///", "")
-        migrate_logs_payload(db_path)
-    _ensure_cookiecloud_uuid(engine)
+        run_migrations(db_path, fresh=fresh)
 
 
 def get_session():
@@ -20,16 +29,26 @@ def get_session():
         yield session
 
 
-# lightweight migration: add cookiecloud_uuid column if missing
-def _ensure_cookiecloud_uuid(engine):
-    try:
-        with engine.connect() as conn:
-            res = conn.exec_driver_sql("PRAGMA table_info(site)").fetchall()
-            cols = [row[1] for row in res]
-            if "cookiecloud_uuid" not in cols and "cookiecloud_profile" in cols:
-                # add new column, copy data
-                conn.exec_driver_sql("ALTER TABLE site ADD COLUMN cookiecloud_uuid TEXT")
-                conn.exec_driver_sql("UPDATE site SET cookiecloud_uuid = cookiecloud_profile WHERE cookiecloud_uuid IS NULL")
-    except Exception:
-        return
+def get_read_session():
+    with Session(read_engine) as session:
+        yield session
+
+
+def get_async_read_engine():
+    global _async_read_engine
+    if _async_read_engine is None:
+        _async_read_engine = create_async_db_engine(settings.database_url, read_only=True)
+    return _async_read_engine
+
+
+async def get_async_read_session():
+    async with AsyncSession(get_async_read_engine()) as session:
+        yield session
+
+
+async def dispose_async_engines() -> None:
+    global _async_read_engine
+    if _async_read_engine is not None:
+        await _async_read_engine.dispose()
+        _async_read_engine = None
 
@@ -1,7 +1,8 @@
 from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
 from app.core.config import get_settings
 from app.core.security import require_api_token
-from app.db.session import init_db, engine
+from app.db.session import dispose_async_engines, get_session, init_db
 from app.api.v1.routes.sites import router as sites_router
 from app.api.v1.routes.runs import router as runs_router
 from app.api.v1.routes.logs import router as logs_router
@@ -10,10 +11,9 @@ from app.api.v1.routes.cookiecloud import router as cookiecloud_router
 from app.api.v1.routes.jobs import router as jobs_router
 from app.api.v1.routes.plugins import router as plugins_router
 from app.api.v1.routes.notifications import router as notifications_router
-from app.services.scheduler import start_scheduler, stop_scheduler, tick_message, get_scheduler
-from app.services.executor import RunExecutor
-from app.services.jobs import register_site_jobs
-from app.services.hooks import log_event
+from app.api.v1.routes.stats import router as stats_router
+from app.services.leader import lease_status
+from app.services.runtime import start_roles, stop_roles
 from app.plugins.loader import load_configured_plugins
 from sqlmodel import Session
 
@@ -26,28 +26,23 @@ app = FastAPI(title=settings.project_name, version="0.4.0")
 def on_startup():
     init_db()
     load_configured_plugins()
-
-    def on_tick():
-        with Session(engine) as session:
-            log_event(session, tick_message(), level="debug", event="scheduler.tick")
-            register_site_jobs(get_scheduler(), session)
-            executor = RunExecutor(session)
-            executor.execute_next()
-
-    start_scheduler(on_tick)
+    # Set SCHEDULER_ENABLED / EXECUTION_ENABLED to false when `python -m app.worker` runs them.
+    start_roles(scheduler=settings.scheduler_enabled, execution=settings.execution_enabled)
 
 
 @app.on_event("shutdown")
-def on_shutdown():
-    stop_scheduler()
+async def on_shutdown():
+    # joins worker threads, so keep it off the event loop
+    await run_in_threadpool(stop_roles)
+    await dispose_async_engines()
 
 
 protected_dependencies = [Depends(require_api_token)]
 
 
 @app.get("/api/v1/health", dependencies=protected_dependencies)
-def health():
-    return {"status": "ok"}
+def health(session: Session = Depends(get_session)):
+    return {"status": "ok", "scheduler": lease_status(session)}
 
 app.include_router(
     sites_router,
@@ -67,6 +62,12 @@ app.include_router(
     tags=["logs"],
     dependencies=protected_dependencies,
 )
+app.include_router(
+    stats_router,
+    prefix=f"{settings.api_v1_prefix}/stats",
+    tags=["stats"],
+    dependencies=protected_dependencies,
+)
 app.include_router(
     jobs_router,
     prefix=f"{settings.api_v1_prefix}/jobs",
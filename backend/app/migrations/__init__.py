@@ -1,3 +1,12 @@
-from app.migrations.migrate_logs_payload import migrate_logs_payload
+from app.migrations.runner import Migration, Migrator, current_version, migration_status, run_migrations
+from app.migrations.versions import LATEST_VERSION, MIGRATIONS
 
-__all__ = ["migrate_logs_payload"]
+__all__ = [
+    "LATEST_VERSION",
+    "MIGRATIONS",
+    "Migration",
+    "Migrator",
+    "current_version",
+    "migration_status",
+    "run_migrations",
+]
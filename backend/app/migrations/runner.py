@@ -0,0 +1,216 @@
+"""Versioned SQLite migrations.
+
+Applied versions are recorded in ``schema_version``; startup reads the highest applied
+version and returns immediately when it is current. Pending migrations run in order, each
+one committed on its own. Steps are idempotent (columns and indexes are probed before
+they are created), so a migration interrupted halfway simply runs again. Long backfills
+go through ``Migrator.backfill``, which commits every batch and stores its position, so a
+restart resumes where it stopped instead of starting over.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+BATCH_SIZE = 500
+
+
+class Migrator:
+    """Helpers handed to each migration step."""
+
+    def __init__(self, conn: sqlite3.Connection, version: int):
+        self.conn = conn
+        self.version = version
+
+    def columns(self, table: str) -> List[str]:
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+
+    def add_column(self, table: str, name: str, ddl: str) -> bool:
+        existing = self.columns(table)
+        if not existing or name in existing:
+            return False
+        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+        return True
+
+    def create_index(self, name: str, table: str, columns: Sequence[str]) -> None:
+        # one commit per index: a restart skips the ones already built
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+        self.conn.commit()
+
+    def drop_index(self, name: str) -> None:
+        self.conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def enable_autoincrement(self, table: str, floor_sql: Optional[str] = None) -> bool:
+        """Rebuild ``table`` with ``id INTEGER PRIMARY KEY AUTOINCREMENT`` so ids are never reused.
+
+        The stored CREATE statement is kept as is apart from the primary key; rows are
+        copied with their ids and the indexes recreated, all in one transaction. The id
+        sequence starts after ``floor_sql`` (a query returning one integer) when that is
+        higher than the largest id left in the table.
+        """
+        row = self.conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+        if not row or "AUTOINCREMENT" in row[0].upper():
+            return False
+        new_table = f"{table}__autoinc"
+        create_sql, renamed = re.subn(rf'^CREATE TABLE\s+"?{table}"?', f"CREATE TABLE {new_table}", row[0], 1, re.I)
+        # inline "id INTEGER PRIMARY KEY" (older hand-written tables) or SQLAlchemy's table constraint
+        create_sql, inline = re.subn(
+            r"(\bid\s+INTEGER\s+(?:NOT\s+NULL\s+)?PRIMARY\s+KEY)\b", r"\1 AUTOINCREMENT", create_sql, 1, re.I
+        )
+        if not inline:
+            create_sql, replaced = re.subn(
+                r"(\bid\s+INTEGER\s+NOT\s+NULL)\b", r"\1 PRIMARY KEY AUTOINCREMENT", create_sql, 1, re.I
+            )
+            create_sql, dropped = re.subn(r",\s*PRIMARY\s+KEY\s*\(\s*id\s*\)", "", create_sql, 1, re.I)
+            inline = replaced and dropped
+        if not (renamed and inline):
+            raise RuntimeError(f"unexpected schema for {table}: {row[0]}")
+        index_sql = [
+            sql
+            for (sql,) in self.conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+            )
+        ]
+        columns = ", ".join(self.columns(table))
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.execute(f"DROP TABLE IF EXISTS {new_table}")
+            self.conn.execute(create_sql)
+            self.conn.execute(f"INSERT INTO {new_table} ({columns}) SELECT {columns} FROM {table}")
+            self.conn.execute(f"DROP TABLE {table}")
+            self.conn.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+            for sql in index_sql:
+                self.conn.execute(sql)
+            if floor_sql:
+                floor = self.conn.execute(floor_sql).fetchone()[0] or 0
+                seq = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+                if floor > (seq[0] if seq else 0):
+                    self.conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+                    self.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, floor))
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        return True
+
+    def backfill(
+        self,
+        select_sql: str,
+        apply: Callable[[sqlite3.Connection, Sequence[tuple]], None],
+        batch_size: int = BATCH_SIZE,
+    ) -> int:
+        """Process rows in id order, ``batch_size`` at a time, resuming after a restart.
+
+        ``select_sql`` must select the row id first and take the last processed id and the
+        batch size as parameters, e.g. ``SELECT id, notes FROM site WHERE id > ? ORDER BY id
+        LIMIT ?``. ``apply`` updates one batch; it is committed with the new position.
+        """
+        position = self._position()
+        total = 0
+        while True:
+            rows = self.conn.execute(select_sql, (position, batch_size)).fetchall()
+            if not rows:
+                return total
+            apply(self.conn, rows)
+            position = rows[-1][0]
+            total += len(rows)
+            self.conn.execute(
+                "UPDATE schema_version SET progress = ? WHERE version = ?",
+                (position, self.version),
+            )
+            self.conn.commit()
+
+    def _position(self) -> int:
+        row = self.conn.execute("SELECT progress FROM schema_version WHERE version = ?", (self.version,)).fetchone()
+        return int(row[0]) if row and row[0] is not None else 0
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Migrator], None]
+
+
+def _ensure_version_table(conn: sqlite3.Connection) -> None:
+    # applied_at is NULL while a migration is in progress; progress is its backfill cursor
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT, progress INTEGER)"
+    )
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version WHERE applied_at IS NOT NULL").fetchone()
+    return row[0] or 0
+
+
+def _mark(conn: sqlite3.Connection, migration: Migration, applied: bool) -> None:
+    applied_at = datetime.utcnow().isoformat() if applied else None
+    conn.execute(
+        "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(version) DO UPDATE SET applied_at = excluded.applied_at",
+        (migration.version, migration.name, applied_at),
+    )
+
+
+def run_migrations(db_path: str, migrations: Optional[Iterable[Migration]] = None, fresh: bool = False) -> List[int]:
+    """Apply pending migrations in version order; returns the versions applied.
+
+    ``fresh`` marks a database whose tables were just created from the current models:
+    every migration is recorded as applied without running it.
+    """
+    if migrations is None:
+        from app.migrations.versions import MIGRATIONS
+
+        migrations = MIGRATIONS
+    migrations = sorted(migrations, key=lambda item: item.version)
+    path = Path(db_path)
+    if not path.exists() or not migrations:
+        return []
+    conn = sqlite3.connect(path)
+    try:
+        version = current_version(conn)
+        pending = [migration for migration in migrations if migration.version > version]
+        if not pending:
+            return []
+        applied = []
+        for migration in pending:
+            if fresh:
+                _mark(conn, migration, applied=True)
+                continue
+            _mark(conn, migration, applied=False)
+            conn.commit()
+            migration.apply(Migrator(conn, migration.version))
+            _mark(conn, migration, applied=True)
+            conn.commit()
+            applied.append(migration.version)
+        conn.commit()
+        return applied
+    finally:
+        conn.close()
+
+
+def migration_status(db_path: str) -> List[Tuple[int, str, Optional[str], Optional[int]]]:
+    conn = sqlite3.connect(db_path)
+    try:
+        _ensure_version_table(conn)
+        return conn.execute("SELECT version, name, applied_at, progress FROM schema_version ORDER BY version").fetchall()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        print("applied:", run_migrations(sys.argv[1]) or "none (up to date)")
+        for row in migration_status(sys.argv[1]):
+            print(*row)
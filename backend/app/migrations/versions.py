@@ -0,0 +1,109 @@
+"""Schema migrations, oldest first.
+
+Append new migrations with the next version number; never renumber or edit one that has
+shipped. New tables need no migration: ``create_all`` creates them on startup.
+"""
+from __future__ import annotations
+
+import sqlite3
+from typing import List, Sequence
+
+from app.migrations.runner import Migration, Migrator
+
+
+def _logentry_event_payload(m: Migrator) -> None:
+    m.add_column("logentry", "event", "TEXT")
+    m.add_column("logentry", "payload", "TEXT")
+
+
+def _site_cookiecloud_uuid(m: Migrator) -> None:
+    if "cookiecloud_profile" in m.columns("site") and m.add_column("site", "cookiecloud_uuid", "TEXT"):
+        m.conn.execute("UPDATE site SET cookiecloud_uuid = cookiecloud_profile WHERE cookiecloud_uuid IS NULL")
+
+
+def _run_force_timings(m: Migrator) -> None:
+    m.add_column("run", "force", "BOOLEAN NOT NULL DEFAULT 0")
+    m.add_column("run", "timings", "TEXT")
+    m.create_index("ix_run_site_status_finished", "run", ("site_id", "status", "finished_at"))
+
+
+def _copy_note_crons(conn: sqlite3.Connection, rows: Sequence[tuple]) -> None:
+    from app.services.schedule import extract_cron, normalize_cron, validate_cron_expression
+
+    for site_id, notes in rows:
+        # a note that does not parse is left alone rather than failing startup
+        try:
+            cron_expr = normalize_cron(extract_cron(notes))
+        except Exception:  # noqa: BLE001
+            continue
+        if cron_expr and validate_cron_expression(cron_expr) is None:
+            conn.execute("UPDATE site SET cron = ? WHERE id = ? AND cron IS NULL", (cron_expr, site_id))
+
+
+def _site_cron(m: Migrator) -> None:
+    m.add_column("site", "cron", "TEXT")
+    m.create_index("ix_site_cron", "site", ("cron",))
+    # copy ``cron:`` lines out of site notes into the new column
+    m.backfill(
+        "SELECT id, notes FROM site WHERE id > ? AND cron IS NULL AND notes LIKE '%cron:%' ORDER BY id LIMIT ?",
+        _copy_note_crons,
+    )
+
+
+def _site_schedule_fields(m: Migrator) -> None:
+    m.add_column("site", "spread_minutes", "INTEGER")
+    m.add_column("site", "retry_policy", "TEXT")
+    m.add_column("site", "last_fired_at", "DATETIME")
+
+
+def _run_queue_fields(m: Migrator) -> None:
+    m.add_column("run", "coalesced_count", "INTEGER NOT NULL DEFAULT 0")
+    m.add_column("run", "source", "TEXT")
+    m.add_column("run", "priority", "INTEGER NOT NULL DEFAULT 1")
+    m.add_column("run", "queue_flow", "TEXT")
+    m.add_column("run", "queue_tag", "REAL NOT NULL DEFAULT 0")
+    m.add_column("run", "attempt", "INTEGER NOT NULL DEFAULT 1")
+    m.add_column("run", "retry_of", "INTEGER")
+    m.add_column("run", "not_before", "DATETIME")
+    # superseded by ix_run_claim
+    m.drop_index("ix_run_status_id")
+    m.create_index("ix_run_claim", "run", ("status", "priority", "queue_tag", "id"))
+    m.create_index("ix_run_status_tag", "run", ("status", "queue_tag"))
+    m.create_index("ix_run_flow_tag", "run", ("status", "queue_flow", "queue_tag"))
+    m.create_index("ix_run_retry_of", "run", ("retry_of",))
+
+
+def _run_stats_backfill(m: Migrator) -> None:
+    # the runstats table itself comes from create_all; count the existing history once
+    from sqlmodel import Session
+
+    from app.db.session import engine
+    from app.services.stats import rebuild_stats
+
+    with Session(engine) as session:
+        rebuild_stats(session)
+
+
+def _run_result_data(m: Migrator) -> None:
+    m.add_column("run", "result_data", "TEXT")
+
+
+def _run_autoincrement(m: Migrator) -> None:
+    # archiving can empty the run table; without AUTOINCREMENT new runs would take the ids
+    # of archived ones
+    m.enable_autoincrement("run", floor_sql="SELECT MAX(run_id) FROM archivedrun")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "logentry event and payload", _logentry_event_payload),
+    Migration(2, "site cookiecloud_uuid", _site_cookiecloud_uuid),
+    Migration(3, "run force, timings and idempotency index", _run_force_timings),
+    Migration(4, "site cron column", _site_cron),
+    Migration(5, "site spread, retry policy and last fire", _site_schedule_fields),
+    Migration(6, "run queue priority, fairness and retries", _run_queue_fields),
+    Migration(7, "run statistics from history", _run_stats_backfill),
+    Migration(8, "run result data", _run_result_data),
+    Migration(9, "monotonic run ids", _run_autoincrement),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
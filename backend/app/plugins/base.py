@@ -11,14 +11,34 @@ class PluginResult:
     ok: bool
     message: str = ""
     data: Dict[str, Any] = field(default_factory=dict)
+    # A failure worth retrying (rate limit, upstream hiccup); see RetryPolicy.
+    retryable: bool = False
 
     @classmethod
     def success(cls, message: str = "", **data: Any) -> "PluginResult":
         return cls(ok=True, message=message, data=data)
 
     @classmethod
-    def failure(cls, message: str, **data: Any) -> "PluginResult":
-        return cls(ok=False, message=message, data=data)
+    def failure(cls, message: str, retryable: bool = False, **data: Any) -> "PluginResult":
+        return cls(ok=False, message=message, data=data, retryable=retryable)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How failed runs are retried as delayed runs.
+
+    ``max_attempts`` counts the first run, so the default of 1 never retries. Attempt ``n``
+    waits ``backoff_seconds * backoff_factor ** (n - 1)`` (capped at ``max_backoff_seconds``)
+    with +/- ``jitter`` (a fraction). Retryable failures are results with ``retryable=True``
+    and, with ``retry_on_exception``, transient network exceptions.
+    """
+
+    max_attempts: int = 1
+    backoff_seconds: float = 60
+    backoff_factor: float = 2.0
+    max_backoff_seconds: float = 3600
+    jitter: float = 0.1
+    retry_on_exception: bool = True
 
 
 @dataclass
@@ -35,6 +55,14 @@ class PluginContext:
     # Optional CookieCloud injected data (kept optional to avoid breaking existing plugins)
     cookiecloud_cookies: Optional[List[Dict[str, Any]]] = None
     cookiecloud_local_storage: Optional[Dict[str, Any]] = None
+    # Set by the executor (an ArtifactWriter); use save_artifact() rather than this directly
+    artifacts: Optional[Any] = None
+
+    def save_artifact(self, name: str, data: Any, content_type: Optional[str] = None) -> Optional[str]:
+        """Keep ``data`` (bytes or text) with this run; returns its sha256, or None if rejected."""
+        if self.artifacts is None:
+            return None
+        return self.artifacts.save(name, data, content_type)
 
 
 @dataclass
@@ -57,6 +85,15 @@ class SitePlugin:
     version: str = "1.0"
     category: str = "general"
     config_schema: List[PluginConfigField] = []
+    # Batching: only used when the plugin overrides run_batch().
+    batch_by_cookie_domain: bool = True
+    # Idempotency window ("daily" / "hourly", in the configured timezone): a run is skipped
+    # when the site already succeeded inside the current window, unless the run is forced.
+    idempotency: Optional[str] = None
+    # Weighted fair queuing: relative share of executor claims versus other plugins.
+    queue_weight: float = 1.0
+    # Retries for failed runs; sites can override fields via their retry_policy.
+    retry_policy: RetryPolicy = RetryPolicy()
 
     def before_run(self, context: PluginContext) -> Optional[PluginResult]:
         return None
@@ -64,5 +101,13 @@ class SitePlugin:
     def run(self, context: PluginContext) -> PluginResult:
         raise NotImplementedError
 
+    def run_batch(self, contexts: List[PluginContext]) -> List[PluginResult]:
+        """Run several queued runs in one call; results must follow the order of contexts."""
+        return [self.run(context) for context in contexts]
+
     def after_run(self, context: PluginContext, result: PluginResult) -> Optional[PluginResult]:
         return None
+
+
+def supports_batch(plugin: SitePlugin) -> bool:
+    return type(plugin).run_batch is not SitePlugin.run_batch
@@ -1,13 +1,18 @@
 """Plugin loader helpers."""
 from __future__ import annotations
 
-from typing import List
+import time
+from typing import Dict, List
 
 from app.core.config import get_settings
-from app.plugins.registry import load_plugins, reload_plugins
-from app.plugins.store import load_plugin_payloads, _register_plugin
+from app.plugins.manifest import sync_plugins
+from app.plugins.registry import PluginRegistry, get_registry
+from app.plugins.store import custom_plugin_mtimes, load_plugin_payload, _register_plugin
 from app.schemas.plugins import PluginSaveRequest
 
+# custom plugin key -> mtime of its JSON file when it was last registered
+_custom_mtimes: Dict[str, int] = {}
+
 
 def parse_plugin_paths(raw: str) -> List[str]:
     if not raw:
@@ -15,24 +20,40 @@ def parse_plugin_paths(raw: str) -> List[str]:
     return [item.strip() for item in raw.split(",") if item.strip()]
 
 
-def load_configured_plugins():
+def load_configured_plugins() -> PluginRegistry:
     settings = get_settings()
-    paths = parse_plugin_paths(settings.plugin_paths)
-    registry = load_plugins(paths)
-    _load_custom_plugins()
+    registry = get_registry()
+    sync_plugins(parse_plugin_paths(settings.plugin_paths), registry)
+    _load_custom_plugins(registry)
     return registry
 
 
-def reload_configured_plugins():
+def reload_configured_plugins() -> List[Dict[str, object]]:
+    """Reload changed plugin modules and custom plugins, publishing the result atomically."""
     settings = get_settings()
-    paths = parse_plugin_paths(settings.plugin_paths)
-    registry = reload_plugins(paths)
-    _load_custom_plugins()
-    return registry
+    registry = get_registry()
+    with registry.swap():
+        report = sync_plugins(parse_plugin_paths(settings.plugin_paths), registry)
+        report.extend(_load_custom_plugins(registry))
+    return report
 
 
-def _load_custom_plugins() -> None:
-    for data in load_plugin_payloads():
+def _load_custom_plugins(registry: PluginRegistry) -> List[Dict[str, object]]:
+    report: List[Dict[str, object]] = []
+    mtimes = custom_plugin_mtimes()
+    removed = [key for key in _custom_mtimes if key not in mtimes]
+    if removed:
+        registry.remove(removed)
+        for key in removed:
+            _custom_mtimes.pop(key, None)
+            report.append({"module": f"custom:{key}", "action": "removed", "plugins": [key], "duration_ms": 0.0})
+    for key, mtime in mtimes.items():
+        if _custom_mtimes.get(key) == mtime and key in registry.staged().plugins:
+            continue
+        started = time.perf_counter()
+        data = load_plugin_payload(key)
+        if not data:
+            continue
         try:
             payload = PluginSaveRequest(
                 key=data.get("key"),
@@ -46,3 +67,13 @@ def _load_custom_plugins() -> None:
             _register_plugin(payload)
         except Exception:
             continue
+        _custom_mtimes[key] = mtime
+        report.append(
+            {
+                "module": f"custom:{key}",
+                "action": "reloaded",
+                "plugins": [payload.key],
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+        )
+    return report
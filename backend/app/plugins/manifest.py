@@ -1,10 +1,32 @@
-"""Plugin manifest helper."""
+"""Plugin manifest helper.
+
+The manifest maps every module under ``PLUGIN_PATHS`` to the plugins it defines (key,
+metadata and config schema) and is persisted next to the database. Modules whose file
+mtime still matches the manifest are not imported at startup; the registry imports them
+the first time a run asks for one of their plugins. A reload re-executes only the modules
+whose mtime changed.
+"""
 from __future__ import annotations
 
+import importlib
+import json
+import os
+import pkgutil
+import sys
+import time
 from dataclasses import asdict, is_dataclass
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.plugins.base import SitePlugin
+from app.plugins.registry import PluginRegistry, get_registry, load_module
+
 
-from app.plugins.registry import get_registry
+DATA_ROOT = Path("./data")
+MANIFEST_FILE = "plugins_manifest.json"
+# 2: metadata carries queue_weight
+MANIFEST_VERSION = 2
 
 
 def _field_payload(field) -> dict:
@@ -20,15 +42,149 @@ def _field_payload(field) -> dict:
     }
 
 
+def plugin_meta(plugin: SitePlugin) -> Dict[str, object]:
+    return {
+        "key": plugin.key,
+        "name": plugin.name,
+        "description": plugin.description,
+        "version": getattr(plugin, "version", "1.0"),
+        "category": getattr(plugin, "category", "general"),
+        "config_schema": [_field_payload(field) for field in getattr(plugin, "config_schema", [])],
+        # read at enqueue time without importing the plugin (services/run_queue.py)
+        "queue_weight": getattr(plugin, "queue_weight", 1.0),
+    }
+
+
 def list_plugins() -> List[Dict[str, object]]:
-    return [
+    registry = get_registry()
+    plugins = {key: entry.meta for key, entry in registry.lazy.items()}
+    for plugin in registry.list():
+        plugins[plugin.key] = plugin_meta(plugin)
+    return list(plugins.values())
+
+
+def manifest_path() -> Path:
+    settings = get_settings()
+    base_dir = settings.database_url.replace("sqlite:///", "")
+    base_path = Path(base_dir).parent if base_dir else DATA_ROOT
+    return base_path / MANIFEST_FILE
+
+
+def load_manifest() -> Dict[str, Dict[str, object]]:
+    path = manifest_path()
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    modules = data.get("modules")
+    return modules if isinstance(modules, dict) else {}
+
+
+def save_manifest(modules: Dict[str, Dict[str, object]]) -> None:
+    path = manifest_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": MANIFEST_VERSION, "modules": modules}
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    except OSError:
+        return
+
+
+def discover_modules(package_path: str) -> List[Tuple[str, Optional[str]]]:
+    """List (module name, file path) under a package without importing the modules."""
+    package = importlib.import_module(package_path)
+    modules = []
+    for info in pkgutil.iter_modules(package.__path__, package.__name__ + "."):
+        spec = info.module_finder.find_spec(info.name)
+        modules.append((info.name, spec.origin if spec else None))
+    return modules
+
+
+def module_mtime(path: Optional[str]) -> Optional[int]:
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def sync_plugins(paths: Iterable[str], registry: Optional[PluginRegistry] = None) -> List[Dict[str, object]]:
+    """Bring the registry in line with the plugin modules on disk.
+
+    New or changed modules are (re)imported, unchanged ones are registered lazily from the
+    manifest and plugins of removed modules are dropped. Returns one report entry per
+    module that was imported, failed or removed.
+    """
+    registry = registry or get_registry()
+    cached = load_manifest()
+    modules: Dict[str, Dict[str, object]] = {}
+    report: List[Dict[str, object]] = []
+    for package_path in paths:
+        for name, origin in discover_modules(package_path):
+            mtime = module_mtime(origin)
+            entry = cached.get(name)
+            if entry and mtime is not None and entry.get("mtime") == mtime:
+                for meta in entry.get("plugins") or []:
+                    registry.register_lazy(meta["key"], name, meta)
+                modules[name] = entry
+                continue
+            modules[name] = _import_module(registry, name, origin, mtime, entry, report)
+    for name, entry in cached.items():
+        if name in modules:
+            continue
+        keys = [meta["key"] for meta in entry.get("plugins") or []]
+        registry.remove(keys)
+        report.append({"module": name, "action": "removed", "plugins": keys, "duration_ms": 0.0})
+    if report or set(modules) != set(cached):
+        save_manifest(modules)
+    return report
+
+
+def _import_module(
+    registry: PluginRegistry,
+    name: str,
+    origin: Optional[str],
+    mtime: Optional[int],
+    entry: Optional[Dict[str, object]],
+    report: List[Dict[str, object]],
+) -> Dict[str, object]:
+    previous = [meta["key"] for meta in (entry or {}).get("plugins") or []]
+    before = {key: plugin for key, plugin in registry.staged().plugins.items() if type(plugin).__module__ == name}
+    # Modules already imported without plugins (base, registry, ...) must not be executed again.
+    if name in sys.modules and not previous and not before:
+        return {"path": origin, "mtime": mtime, "plugins": []}
+
+    action = "reloaded" if name in sys.modules else "imported"
+    started = time.perf_counter()
+    try:
+        load_module(name)
+    except Exception as exc:  # noqa: BLE001
+        # Keep serving the previous version; mtime is not recorded so the next sync retries.
+        report.append(
+            {
+                "module": name,
+                "action": "error",
+                "plugins": sorted(before),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "error": str(exc),
+            }
+        )
+        return {"path": origin, "mtime": None, "plugins": (entry or {}).get("plugins") or []}
+
+    after = {key: plugin for key, plugin in registry.staged().plugins.items() if type(plugin).__module__ == name}
+    fresh = [key for key, plugin in after.items() if before.get(key) is not plugin]
+    registry.remove((set(before) | set(previous)) - set(fresh))
+    report.append(
         {
-            "key": plugin.key,
-            "name": plugin.name,
-            "description": plugin.description,
-            "version": getattr(plugin, "version", "1.0"),
-            "category": getattr(plugin, "category", "general"),
-            "config_schema": [_field_payload(field) for field in getattr(plugin, "config_schema", [])],
+            "module": name,
+            "action": action,
+            "plugins": sorted(fresh),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
         }
-        for plugin in get_registry().list()
-    ]
+    )
+    return {"path": origin, "mtime": mtime, "plugins": [plugin_meta(after[key]) for key in fresh]}
@@ -2,34 +2,115 @@
 from __future__ import annotations
 
 import importlib
-import pkgutil
+import sys
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, List, Optional, Type
+from typing import Dict, Iterable, Iterator, List, Optional, Type
 
 from app.plugins.base import SitePlugin
 
 
 @dataclass
-class PluginRegistry:
+class LazyPlugin:
+    module: str
+    meta: Dict[str, object]
+
+
+@dataclass
+class RegistrySnapshot:
     plugins: Dict[str, SitePlugin] = field(default_factory=dict)
+    # Plugins known from the manifest whose module has not been imported yet.
+    lazy: Dict[str, LazyPlugin] = field(default_factory=dict)
+
+    def copy(self) -> "RegistrySnapshot":
+        return RegistrySnapshot(plugins=dict(self.plugins), lazy=dict(self.lazy))
+
+
+class PluginRegistry:
+    """Copy-on-write plugin registry.
+
+    Readers always see one published snapshot; writers build a new snapshot and publish it
+    with a single assignment, so a run never observes a half-reloaded registry.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot = RegistrySnapshot()
+        self._staging: Optional[RegistrySnapshot] = None
+        self._lock = threading.RLock()
+
+    @property
+    def plugins(self) -> Dict[str, SitePlugin]:
+        return self._snapshot.plugins
+
+    @property
+    def lazy(self) -> Dict[str, LazyPlugin]:
+        return self._snapshot.lazy
 
     def register(self, plugin_cls: Type[SitePlugin]) -> None:
         plugin = plugin_cls()
-        self.plugins[plugin.key] = plugin
+        with self._edit() as snapshot:
+            snapshot.plugins[plugin.key] = plugin
+            snapshot.lazy.pop(plugin.key, None)
+
+    def register_lazy(self, key: str, module: str, meta: Dict[str, object]) -> None:
+        with self._edit() as snapshot:
+            if key not in snapshot.plugins:
+                snapshot.lazy[key] = LazyPlugin(module=module, meta=meta)
+
+    def remove(self, keys: Iterable[str]) -> None:
+        with self._edit() as snapshot:
+            for key in keys:
+                snapshot.plugins.pop(key, None)
+                snapshot.lazy.pop(key, None)
 
     def get(self, key: Optional[str]) -> Optional[SitePlugin]:
         if not key:
             return None
-        return self.plugins.get(key)
+        snapshot = self._snapshot
+        plugin = snapshot.plugins.get(key)
+        if plugin is None and key in snapshot.lazy:
+            with self._lock:
+                entry = self._snapshot.lazy.get(key)
+                if entry is not None and key not in self._snapshot.plugins:
+                    load_module(entry.module)
+            plugin = self._snapshot.plugins.get(key)
+        return plugin
 
     def list(self) -> List[SitePlugin]:
-        return list(self.plugins.values())
-
-    def reload(self, paths: Iterable[str]) -> "PluginRegistry":
-        self.plugins = {}
-        for path in paths:
-            _import_all(path)
-        return self
+        return list(self._snapshot.plugins.values())
+
+    def is_empty(self) -> bool:
+        snapshot = self._snapshot
+        return not snapshot.plugins and not snapshot.lazy
+
+    def staged(self) -> RegistrySnapshot:
+        """Snapshot that writes currently go to (the staging copy during ``swap``)."""
+        return self._staging or self._snapshot
+
+    @contextmanager
+    def swap(self) -> Iterator[RegistrySnapshot]:
+        """Collect every registration made inside the block and publish them at once.
+
+        If the block raises, the published snapshot is left untouched.
+        """
+        with self._lock:
+            self._staging = self._snapshot.copy()
+            try:
+                yield self._staging
+                self._snapshot = self._staging
+            finally:
+                self._staging = None
+
+    @contextmanager
+    def _edit(self) -> Iterator[RegistrySnapshot]:
+        with self._lock:
+            if self._staging is not None:
+                yield self._staging
+                return
+            snapshot = self._snapshot.copy()
+            yield snapshot
+            self._snapshot = snapshot
 
 
 _registry: Optional[PluginRegistry] = None
@@ -42,21 +123,10 @@ def get_registry() -> PluginRegistry:
     return _registry
 
 
-def load_plugins(paths: Iterable[str]) -> PluginRegistry:
-    registry = get_registry()
-    for path in paths:
-        _import_all(path)
-    return registry
-
-
-def reload_plugins(paths: Iterable[str]) -> PluginRegistry:
-    registry = get_registry()
-    return registry.reload(paths)
-
-
-def _import_all(package_path: str) -> None:
-    module = importlib.import_module(package_path)
-    for _, name, is_pkg in pkgutil.iter_modules(module.__path__, module.__name__ + "."):
+def load_module(name: str) -> None:
+    # A module can already be imported while its plugins are gone from the registry
+    # (or changed on disk); executing it again re-registers them.
+    if name in sys.modules:
+        importlib.reload(sys.modules[name])
+    else:
         importlib.import_module(name)
-        if is_pkg:
-            continue
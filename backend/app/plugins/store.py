@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from app.core.config import get_settings
 from app.plugins.base import SitePlugin, PluginConfigField, PluginResult
@@ -69,6 +69,27 @@ def load_plugin_payloads() -> List[Dict[str, object]]:
     return payloads
 
 
+def load_plugin_payload(key: str) -> Optional[Dict[str, object]]:
+    try:
+        data = json.loads(_plugin_path(key).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    return data or None
+
+
+def custom_plugin_mtimes() -> Dict[str, int]:
+    root = _plugin_root()
+    if not root.exists():
+        return {}
+    mtimes = {}
+    for file in root.glob("*.json"):
+        try:
+            mtimes[file.stem] = file.stat().st_mtime_ns
+        except OSError:
+            continue
+    return mtimes
+
+
 def _serialize(payload) -> str:
     return json.dumps(payload.dict(), ensure_ascii=False, indent=2)
 
@@ -114,4 +135,11 @@ def _to_meta(data: Dict[str, object]) -> Dict[str, object]:
         "config_schema": data.get("config_schema") or [],
     }
 
-__all__ = ["list_custom_plugins", "create_or_update_plugin", "load_plugin_payloads", "_register_plugin"]
+__all__ = [
+    "list_custom_plugins",
+    "create_or_update_plugin",
+    "load_plugin_payloads",
+    "load_plugin_payload",
+    "custom_plugin_mtimes",
+    "_register_plugin",
+]
@@ -15,9 +15,39 @@ class ConfigResponse(BaseModel):
     cookiecloud_verify_ssl: bool
     cookiecloud_send_json: bool
     scheduler_enabled: bool
+    execution_enabled: bool
     api_token: str
     plugin_paths: str
     admin_token: str
+    batch_max_size: int
+    batch_max_wait_seconds: float
+    schedule_spread_minutes: int
+    queue_coalesce: bool
+    queue_max_depth: int
+    queue_overflow_policy: str
+    catchup_grace_minutes: int
+    catchup_spread_seconds: int
+    executor_concurrency: int
+    dispatch_poll_seconds: float
+    leader_lease_seconds: float
+    leader_renew_seconds: float
+    sqlite_journal_mode: str
+    sqlite_synchronous: str
+    sqlite_busy_timeout_ms: int
+    sqlite_cache_size_mb: int
+    sqlite_mmap_size_mb: int
+    sqlite_temp_store: str
+    db_pool_size: int
+    db_max_overflow: int
+    archive_after_days: int
+    archive_dir: str
+    archive_batch_size: int
+    result_data_max_bytes: int
+    result_data_max_string: int
+    result_data_compress_bytes: int
+    artifact_dir: str
+    artifact_max_bytes: int
+    artifact_compress: bool
     plugins: List[Dict[str, Any]]
     ui_settings: Dict[str, Any]
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 
 
@@ -12,9 +12,117 @@ class JobOut(BaseModel):
 class JobRunRequest(BaseModel):
     site_id: int
     cron: Optional[str] = None
+    force: bool = False
+
+
+class LoadBucket(BaseModel):
+    start: datetime
+    count: int
+
+
+class LoadHistogram(BaseModel):
+    start: datetime
+    end: datetime
+    bucket_minutes: int
+    total: int
+    peak: Optional[LoadBucket] = None
+    buckets: List[LoadBucket]
+    # most fires against one host within a single bucket
+    host_peaks: Dict[str, int]
+
+
+class TimelineFire(BaseModel):
+    fire_time: datetime
+    site_id: int
+    site_name: str
+
+
+class Timeline(BaseModel):
+    start: datetime
+    end: datetime
+    total: int
+    # set when per-bucket counts were requested instead of individual fires
+    bucket_minutes: Optional[int] = None
+    peak: Optional[LoadBucket] = None
+    buckets: List[LoadBucket] = []
+    fires: List[TimelineFire] = []
+    truncated: bool = False
 
 
 class JobRunResponse(BaseModel):
     ok: bool
     run_id: int
     status: str
+    # an identical run was already queued and is returned instead
+    coalesced: bool = False
+
+
+class JobBulkRunRequest(BaseModel):
+    # sites to enqueue; None selects every site matching the other filters
+    site_ids: Optional[List[int]] = None
+    # None matches enabled and disabled sites
+    enabled: Optional[bool] = True
+    plugin_key: Optional[str] = None
+    force: bool = False
+
+
+class JobBulkRunResponse(BaseModel):
+    matched: int
+    # site id -> run id
+    enqueued: Dict[int, int]
+    coalesced: Dict[int, int]
+    # sites that got no run because the queue was full
+    rejected: List[int]
+    dropped: List[int] = []
+
+
+class QueueStatus(BaseModel):
+    depth: int
+    delayed: int = 0
+    oldest_queued_at: Optional[datetime] = None
+    max_depth: int
+    overflow_policy: str
+    coalesce: bool
+    # repeat enqueues folded into runs that are still queued / into any run
+    coalesced: int
+    coalesced_total: int
+    dropped_total: int
+    # rejected by this process since it started
+    rejected: int
+
+
+class TickStatus(BaseModel):
+    interval_seconds: int
+    ticks: int
+    # fires dropped because the previous tick was still running
+    skipped_ticks: int
+    missed_ticks: int
+    tick_errors: int
+    last_tick_at: Optional[datetime] = None
+    # how late the tick started relative to its scheduled time
+    last_lag_ms: float
+    avg_lag_ms: float
+    max_lag_ms: float
+    last_duration_ms: float
+    max_duration_ms: float
+    # site cron jobs
+    cron_fires: int
+    cron_max_lag_ms: float
+    cron_skipped: int
+    cron_missed: int
+
+
+class DispatcherStatus(BaseModel):
+    workers: int
+    busy: int
+    executed: int
+    errors: int
+    last_run_at: Optional[datetime] = None
+    poll_seconds: float
+
+
+class SchedulerStatus(BaseModel):
+    running: bool
+    tick: TickStatus
+    # absent when this process does not execute runs
+    dispatcher: Optional[DispatcherStatus] = None
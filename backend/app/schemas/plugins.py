@@ -31,9 +31,19 @@ class PluginList(RootModel[List[PluginMeta]]):
     pass
 
 
+class PluginReloadModule(BaseModel):
+    module: str
+    action: str
+    plugins: List[str] = []
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+
+
 class PluginReloadResult(BaseModel):
     count: int
     plugins: List[PluginMeta]
+    modules: List[PluginReloadModule] = []
+    duration_ms: float = 0.0
 
     class Config:
         orm_mode = True
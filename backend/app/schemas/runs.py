@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Literal
 from pydantic import BaseModel
 
 
@@ -11,12 +11,24 @@ class RunBase(BaseModel):
     error: Optional[str] = None
     plugin_key: Optional[str] = None
     plugin_config: Optional[Dict[str, Any]] = None
+    force: bool = False
+    coalesced_count: int = 0
+    source: Optional[str] = None
+    priority: int = 1
+    attempt: int = 1
+    retry_of: Optional[int] = None
+    not_before: Optional[datetime] = None
+    timings: Optional[Dict[str, float]] = None
+    # PluginResult.data (capped, see services/result_data.py)
+    result_data: Optional[Dict[str, Any]] = None
 
 
 class RunCreate(BaseModel):
     site_id: int
     plugin_key: Optional[str] = None
     plugin_config: Optional[Dict[str, Any]] = None
+    force: bool = False
+    source: Literal["manual", "scheduled", "retry"] = "manual"
 
 
 class RunUpdate(BaseModel):
@@ -31,3 +43,61 @@ class RunUpdate(BaseModel):
 class RunOut(RunBase):
     id: int
     created_at: datetime
+
+
+class RunFields(BaseModel):
+    """A run limited to the fields requested with ``GET /runs?fields=``."""
+
+    id: int
+    site_id: Optional[int] = None
+    status: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    plugin_key: Optional[str] = None
+    plugin_config: Optional[Dict[str, Any]] = None
+    force: Optional[bool] = None
+    coalesced_count: Optional[int] = None
+    source: Optional[str] = None
+    priority: Optional[int] = None
+    attempt: Optional[int] = None
+    retry_of: Optional[int] = None
+    not_before: Optional[datetime] = None
+    timings: Optional[Dict[str, float]] = None
+    result_data: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+
+
+class PhaseTimingStats(BaseModel):
+    count: int
+    avg: float
+    p50: float
+    p95: float
+    max: float
+    total: float
+
+
+class RunTimingSummary(BaseModel):
+    runs: int
+    phases: Dict[str, PhaseTimingStats]
+
+
+class RunQueuePosition(BaseModel):
+    run_id: int
+    status: str
+    # 1-based claim position; None once the run left the queue
+    position: Optional[int] = None
+    ahead: int = 0
+    estimated_start_at: Optional[datetime] = None
+    service_seconds: Optional[float] = None
+
+
+class RunArtifactOut(BaseModel):
+    id: int
+    run_id: int
+    name: str
+    content_type: str
+    sha256: str
+    # original (uncompressed) size in bytes
+    size: int
+    created_at: datetime
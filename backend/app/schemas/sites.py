@@ -1,6 +1,17 @@
 from datetime import datetime
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, AnyHttpUrl
+from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, AnyHttpUrl, Field
+
+
+class RetryPolicyIn(BaseModel):
+    """Site overrides for the plugin's retry policy; unset fields keep the plugin value."""
+
+    max_attempts: Optional[int] = Field(default=None, ge=1, le=20)
+    backoff_seconds: Optional[float] = Field(default=None, ge=0)
+    backoff_factor: Optional[float] = Field(default=None, ge=1)
+    max_backoff_seconds: Optional[float] = Field(default=None, ge=0)
+    jitter: Optional[float] = Field(default=None, ge=0, le=1)
+    retry_on_exception: Optional[bool] = None
 
 
 class SiteBase(BaseModel):
@@ -11,6 +22,9 @@ class SiteBase(BaseModel):
     cookiecloud_uuid: Optional[str] = None
     plugin_key: Optional[str] = None
     plugin_config: Optional[Dict[str, Any]] = None
+    cron: Optional[str] = None
+    spread_minutes: Optional[int] = Field(default=None, ge=0, le=1440)
+    retry_policy: Optional[RetryPolicyIn] = None
     notes: Optional[str] = None
 
 
@@ -26,10 +40,46 @@ class SiteUpdate(BaseModel):
     cookiecloud_uuid: Optional[str] = None
     plugin_key: Optional[str] = None
     plugin_config: Optional[Dict[str, Any]] = None
+    cron: Optional[str] = None
+    spread_minutes: Optional[int] = Field(default=None, ge=0, le=1440)
+    retry_policy: Optional[RetryPolicyIn] = None
     notes: Optional[str] = None
 
 
 class SiteOut(SiteBase):
     id: int
+    last_fired_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
+
+
+class SiteBulkUpdate(BaseModel):
+    site_ids: List[int] = Field(min_length=1)
+    changes: SiteUpdate
+
+
+class SiteBulkDelete(BaseModel):
+    site_ids: List[int] = Field(min_length=1)
+
+
+class SiteBulkResult(BaseModel):
+    # sites changed (or deleted)
+    site_ids: List[int]
+    # requested ids that do not exist
+    missing: List[int] = []
+
+
+class SiteImportError(BaseModel):
+    # 1-based data row (header and blank lines not counted)
+    row: int
+    name: Optional[str] = None
+    error: str
+
+
+class SiteImportResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: List[SiteImportError]
+    # more rows failed than are listed in errors
+    errors_truncated: bool = False
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+
+class RunCounters(BaseModel):
+    total: int = 0
+    success: int = 0
+    failed: int = 0
+    skipped: int = 0
+    # success / (success + failed); None before the first attempted run
+    success_rate: Optional[float] = None
+    # consecutive successes (> 0) or failures (< 0) ending with the latest run
+    streak: int = 0
+    best_streak: int = 0
+    last_run_at: Optional[datetime] = None
+    last_success_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+    avg_duration_ms: Optional[float] = None
+    # run count per duration bucket (le_1s ... gt_10m)
+    durations: Dict[str, int] = {}
+
+
+class SiteRunStats(RunCounters):
+    site_id: int
+    site_name: str
+    enabled: bool
+
+
+class PluginRunStats(RunCounters):
+    plugin_key: str
+
+
+class StatsSummary(BaseModel):
+    totals: RunCounters
+    sites: List[SiteRunStats]
+    plugins: List[PluginRunStats]
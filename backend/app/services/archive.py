@@ -0,0 +1,207 @@
+"""Cold storage for old runs and logs.
+
+Finished runs older than ``ARCHIVE_AFTER_DAYS`` move, together with their logs, out of the
+database into monthly segment files under ``ARCHIVE_DIR`` (default: ``archive`` next to the
+database file): ``runs-YYYY-MM.ndjson.gz`` holds one gzip member per archive batch, each
+member an NDJSON list of
+``{"run": ..., "logs": [...]}`` records. Segments are append-only (concatenated gzip
+members are still a valid gzip file). The ``archivedrun`` table maps a run id to the
+byte range of its member, so reading an archived run decompresses one member. Logs
+without a run go to ``logs-YYYY-MM.ndjson.gz`` and are not indexed. Artifacts of archived
+runs are not kept: their rows are deleted with the runs and the hourly artifact GC job
+removes the blobs.
+
+A batch is appended and fsynced before the index rows are inserted and the originals
+deleted in one transaction; a crash in between leaves an unreferenced member behind and
+the batch is archived again on the next pass.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import get_settings
+from app.db.models import ArchivedRun, LogEntry, Run
+from app.services.artifacts import collect_garbage, delete_run_artifacts
+from app.services.executor import QUEUED_STATUS, RUNNING_STATUS
+from app.services.hooks import log_event
+
+ARCHIVE_JOB_ID = "archive"
+
+
+def archive_dir() -> Path:
+    settings = get_settings()
+    return Path(settings.archive_dir or os.path.join(settings.data_dir, "archive"))
+
+
+def segment_path(segment: str) -> Path:
+    return archive_dir() / f"{segment}.ndjson.gz"
+
+
+def _month(value: datetime) -> str:
+    return value.strftime("%Y-%m")
+
+
+def _append(segment: str, records: Sequence[dict]) -> Tuple[int, int]:
+    """Append one gzip member with ``records``; returns its (offset, length)."""
+    lines = "".join(json.dumps(record, separators=(",", ":"), default=str) + "\n" for record in records)
+    data = gzip.compress(lines.encode("utf-8"))
+    path = segment_path(segment)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as handle:
+        offset = handle.seek(0, os.SEEK_END)
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    return offset, len(data)
+
+
+@lru_cache(maxsize=16)
+def _read_member(path: str, offset: int, length: int) -> Tuple[dict, ...]:
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        data = handle.read(length)
+    return tuple(json.loads(line) for line in gzip.decompress(data).decode("utf-8").splitlines() if line)
+
+
+def load_archived_run(session: Session, run_id: int) -> Optional[Tuple[Run, List[LogEntry]]]:
+    """The archived run and its logs, or None when the run was never archived."""
+    entry = session.get(ArchivedRun, run_id)
+    return _load_record(entry, run_id) if entry else None
+
+
+async def load_archived_run_async(session: AsyncSession, run_id: int) -> Optional[Tuple[Run, List[LogEntry]]]:
+    entry = await session.get(ArchivedRun, run_id)
+    if entry is None:
+        return None
+    # segment reads and decompression stay off the event loop
+    return await asyncio.to_thread(_load_record, entry, run_id)
+
+
+def _load_record(entry: ArchivedRun, run_id: int) -> Optional[Tuple[Run, List[LogEntry]]]:
+    try:
+        records = _read_member(str(segment_path(entry.segment)), entry.offset, entry.length)
+    except (OSError, EOFError, ValueError):
+        return None
+    for record in records:
+        if record["run"]["id"] == run_id:
+            return Run.model_validate(record["run"]), [LogEntry.model_validate(log) for log in record["logs"]]
+    return None
+
+
+def archive_old_runs(
+    session: Session,
+    older_than_days: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """Move finished runs (with their logs) and run-less logs past the threshold to segments."""
+    settings = get_settings()
+    days = settings.archive_after_days if older_than_days is None else older_than_days
+    if days <= 0:
+        return {"runs": 0, "logs": 0}
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    batch_size = max(settings.archive_batch_size, 1)
+    runs_archived = logs_archived = 0
+
+    while True:
+        runs = list(
+            session.exec(
+                select(Run)
+                .where(Run.created_at < cutoff, Run.status.not_in((QUEUED_STATUS, RUNNING_STATUS)))
+                .order_by(Run.id)
+                .limit(batch_size)
+            )
+        )
+        if not runs:
+            break
+        run_ids = [run.id for run in runs]
+        logs: Dict[int, List[dict]] = defaultdict(list)
+        for log in session.exec(select(LogEntry).where(LogEntry.run_id.in_(run_ids)).order_by(LogEntry.id)):
+            logs[log.run_id].append(log.model_dump(mode="json"))
+            logs_archived += 1
+
+        by_month: Dict[str, List[Run]] = defaultdict(list)
+        for run in runs:
+            by_month[_month(run.created_at)].append(run)
+        for month, month_runs in sorted(by_month.items()):
+            segment = f"runs-{month}"
+            records = [{"run": run.model_dump(mode="json"), "logs": logs.get(run.id, [])} for run in month_runs]
+            offset, length = _append(segment, records)
+            for run in month_runs:
+                session.merge(
+                    ArchivedRun(run_id=run.id, site_id=run.site_id, segment=segment, offset=offset, length=length)
+                )
+        session.execute(delete(LogEntry).where(LogEntry.run_id.in_(run_ids)))
+        delete_run_artifacts(session, run_ids)
+        session.execute(delete(Run).where(Run.id.in_(run_ids)))
+        session.commit()
+        session.expunge_all()
+        runs_archived += len(runs)
+
+    while True:
+        system_logs = list(
+            session.exec(
+                select(LogEntry)
+                .where(LogEntry.run_id == None, LogEntry.created_at < cutoff)  # noqa: E711
+                .order_by(LogEntry.id)
+                .limit(batch_size)
+            )
+        )
+        if not system_logs:
+            break
+        by_month_logs: Dict[str, List[dict]] = defaultdict(list)
+        for log in system_logs:
+            by_month_logs[_month(log.created_at)].append(log.model_dump(mode="json"))
+        for month, records in sorted(by_month_logs.items()):
+            _append(f"logs-{month}", records)
+        session.execute(delete(LogEntry).where(LogEntry.id.in_([log.id for log in system_logs])))
+        session.commit()
+        session.expunge_all()
+        logs_archived += len(system_logs)
+
+    if runs_archived or logs_archived:
+        log_event(
+            session,
+            f"Archived {runs_archived} run(s) and {logs_archived} log(s) older than {days} days",
+            level="info",
+            event="archive.done",
+            payload={"runs": runs_archived, "logs": logs_archived, "cutoff": cutoff.isoformat()},
+        )
+    return {"runs": runs_archived, "logs": logs_archived}
+
+
+def run_archiver() -> None:
+    """Scheduler job entry point."""
+    from app.db.session import engine
+
+    with Session(engine) as session:
+        archive_old_runs(session)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.db.session import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Archive old runs and logs into segment files.")
+    parser.add_argument("--days", type=int, default=None, help="defaults to ARCHIVE_AFTER_DAYS")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards to shrink the file")
+    args = parser.parse_args()
+    init_db()
+    with Session(engine) as session:
+        print(archive_old_runs(session, older_than_days=args.days))
+        print(collect_garbage(session))
+    if args.vacuum:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
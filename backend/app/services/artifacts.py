@@ -0,0 +1,224 @@
+"""Content-addressed store for files plugins keep with a run.
+
+A plugin calls ``context.save_artifact(name, data)``; the bytes land in
+``<ARTIFACT_DIR>/<sha[:2]>/<sha256>`` (``.gz`` when gzip saved at least a tenth) and a
+``RunArtifact`` row links the run to that hash. Identical outputs (the same screenshot or
+page every day) are stored once. Blobs are written to a temporary file, fsynced and renamed
+into place, so a reader never sees a partial blob.
+
+Rows go away with their run (archiving or ``DELETE /runs/{id}``); the hourly
+``collect_garbage`` job on the scheduler leader then removes blobs no row references. Blobs
+younger than ``GC_GRACE_SECONDS`` are kept, since a running plugin may have written one
+whose row is not committed yet.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.db.models import RunArtifact
+from app.services.hooks import log_event
+
+ARTIFACT_GC_JOB_ID = "artifact-gc"
+GC_GRACE_SECONDS = 3600
+CHUNK_SIZE = 64 * 1024
+# gzip is kept only when the result is at most this fraction of the original
+COMPRESS_RATIO = 0.9
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+
+def artifact_dir() -> Path:
+    settings = get_settings()
+    return Path(settings.artifact_dir or os.path.join(settings.data_dir, "artifacts"))
+
+
+def blob_path(sha256: str, compressed: bool) -> Path:
+    return artifact_dir() / sha256[:2] / (f"{sha256}.gz" if compressed else sha256)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def store_blob(data: bytes) -> Tuple[str, bool]:
+    """Store ``data`` unless an identical blob exists; returns (sha256, compressed)."""
+    sha256 = hashlib.sha256(data).hexdigest()
+    for compressed in (True, False):
+        path = blob_path(sha256, compressed)
+        if path.exists():
+            # refresh the mtime so a concurrent garbage collection keeps it
+            os.utime(path)
+            return sha256, compressed
+    if get_settings().artifact_compress:
+        packed = gzip.compress(data, compresslevel=6, mtime=0)
+        if len(packed) <= len(data) * COMPRESS_RATIO:
+            _write_atomic(blob_path(sha256, True), packed)
+            return sha256, True
+    _write_atomic(blob_path(sha256, False), data)
+    return sha256, False
+
+
+class ArtifactWriter:
+    """Saves artifacts for one run; rows are committed with the run's final state."""
+
+    def __init__(self, session: Session, run_id: int):
+        self.session = session
+        self.run_id = run_id
+
+    def save(self, name: str, data: bytes | str, content_type: Optional[str] = None) -> Optional[str]:
+        """The sha256 of the stored artifact, or None when it was rejected (and logged)."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+            content_type = content_type or "text/plain; charset=utf-8"
+        limit = get_settings().artifact_max_bytes
+        try:
+            if not name or "/" in name or "\\" in name:
+                raise ValueError(f"invalid artifact name {name!r}")
+            if limit > 0 and len(data) > limit:
+                raise ValueError(f"artifact {name!r} is {len(data)} bytes, over ARTIFACT_MAX_BYTES={limit}")
+            sha256, compressed = store_blob(data)
+        except (ValueError, OSError) as exc:
+            log_event(
+                self.session,
+                f"Artifact rejected: {exc}",
+                level="warning",
+                run_id=self.run_id,
+                event="artifact.rejected",
+                payload={"name": name, "size": len(data)},
+            )
+            return None
+        self.session.add(
+            RunArtifact(
+                run_id=self.run_id,
+                name=name,
+                content_type=content_type or DEFAULT_CONTENT_TYPE,
+                sha256=sha256,
+                size=len(data),
+                compressed=compressed,
+            )
+        )
+        return sha256
+
+
+def delete_run_artifacts(session: Session, run_ids: Iterable[int]) -> None:
+    """Drop the artifact rows of ``run_ids``; the caller commits. Blobs go with the next GC pass."""
+    run_ids = list(run_ids)
+    if run_ids:
+        session.execute(delete(RunArtifact).where(RunArtifact.run_id.in_(run_ids)))
+
+
+def collect_garbage(session: Session, grace_seconds: int = GC_GRACE_SECONDS) -> Dict[str, int]:
+    """Remove blobs no artifact row references and older than ``grace_seconds``."""
+    root = artifact_dir()
+    if not root.is_dir():
+        return {"blobs": 0, "bytes": 0}
+    referenced = set(session.exec(select(RunArtifact.sha256).distinct()).all())
+    cutoff = time.time() - grace_seconds
+    removed = freed = 0
+    for path in root.glob("*/*"):
+        sha256 = path.name[:-3] if path.name.endswith(".gz") else path.name
+        if sha256 in referenced:
+            continue
+        try:
+            stat = path.stat()
+            # leftovers of interrupted writes are swept as well
+            if stat.st_mtime > cutoff:
+                continue
+            path.unlink()
+        except OSError:
+            continue
+        removed += 1
+        freed += stat.st_size
+    if removed:
+        log_event(
+            session,
+            f"Removed {removed} unreferenced artifact blob(s)",
+            level="info",
+            event="artifact.gc",
+            payload={"blobs": removed, "bytes": freed},
+        )
+    return {"blobs": removed, "bytes": freed}
+
+
+def run_artifact_gc() -> None:
+    """Scheduler job entry point."""
+    from app.db.session import engine
+
+    with Session(engine) as session:
+        collect_garbage(session)
+
+
+def read_artifact(artifact: RunArtifact, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Original bytes ``start`` to ``end`` (inclusive) of an artifact, in chunks.
+
+    Compressed blobs are inflated while streaming; bytes before ``start`` are decompressed
+    and discarded, which keeps ranges correct without a seekable index.
+    """
+    end = artifact.size - 1 if end is None else end
+    remaining = end - start + 1
+    skip = start
+    path = blob_path(artifact.sha256, artifact.compressed)
+    if artifact.compressed:
+        decompressor = zlib.decompressobj(31)
+        with open(path, "rb") as handle:
+            while remaining > 0:
+                raw = handle.read(CHUNK_SIZE)
+                chunk = decompressor.decompress(raw) if raw else decompressor.flush()
+                if skip:
+                    dropped = min(skip, len(chunk))
+                    chunk = chunk[dropped:]
+                    skip -= dropped
+                if chunk:
+                    chunk = chunk[:remaining]
+                    remaining -= len(chunk)
+                    yield chunk
+                if not raw:
+                    break
+        return
+    with open(path, "rb") as handle:
+        handle.seek(skip)
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.db.session import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Artifact store maintenance.")
+    parser.add_argument("--gc", action="store_true", help="remove blobs no run references")
+    parser.add_argument("--grace", type=int, default=GC_GRACE_SECONDS, help="keep blobs younger than this (seconds)")
+    args = parser.parse_args()
+    init_db()
+    with Session(engine) as session:
+        if args.gc:
+            print(collect_garbage(session, grace_seconds=args.grace))
+        print(artifact_dir())
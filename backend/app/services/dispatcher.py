@@ -0,0 +1,126 @@
+"""Run dispatcher: executes queued runs on worker threads, independent of the scheduler tick."""
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.services.executor import RunExecutor
+
+
+class RunDispatcher:
+    """A small pool of threads that claim and execute queued runs.
+
+    Each worker uses its own Session and claims atomically, so workers (and other
+    processes) never execute the same run twice. Idle workers sleep for
+    ``DISPATCH_POLL_SECONDS`` or until ``notify`` signals new work.
+    """
+
+    def __init__(self, engine, concurrency: int = 1, poll_seconds: float = 2.0):
+        self.engine = engine
+        self.concurrency = max(concurrency, 1)
+        self.poll_seconds = max(poll_seconds, 0.05)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.executed = 0
+        self.errors = 0
+        self.last_run_at: Optional[datetime] = None
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._work, name=f"run-dispatcher-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "workers": len(self._threads),
+            "busy": self.busy,
+            "executed": self.executed,
+            "errors": self.errors,
+            "last_run_at": self.last_run_at,
+            "poll_seconds": self.poll_seconds,
+        }
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = self._execute_one()
+            except Exception:  # noqa: BLE001 - keep the worker alive; the run itself is marked failed
+                with self._lock:
+                    self.errors += 1
+                ran = False
+            if not ran:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _execute_one(self) -> bool:
+        with Session(self.engine) as session:
+            executor = RunExecutor(session)
+            runs = executor.claim_next_batch()
+            if not runs:
+                return False
+            # only workers holding claimed runs count as busy, not idle polls
+            with self._lock:
+                self.busy += 1
+            try:
+                executor.execute_claimed(runs)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+        with self._lock:
+            self.executed += 1
+            self.last_run_at = datetime.utcnow()
+        return True
+
+
+_dispatcher: Optional[RunDispatcher] = None
+
+
+def get_dispatcher() -> Optional[RunDispatcher]:
+    return _dispatcher
+
+
+def start_dispatcher(engine, concurrency: Optional[int] = None) -> RunDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        settings = get_settings()
+        _dispatcher = RunDispatcher(
+            engine,
+            concurrency=concurrency or settings.executor_concurrency,
+            poll_seconds=settings.dispatch_poll_seconds,
+        )
+        _dispatcher.start()
+    return _dispatcher
+
+
+def stop_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is not None:
+        _dispatcher.stop()
+        _dispatcher = None
+
+
+def notify_dispatcher() -> None:
+    """Wake an idle worker of this process (no-op when execution runs elsewhere)."""
+    if _dispatcher is not None:
+        _dispatcher.notify()
@@ -1,48 +1,225 @@
 """Run execution worker."""
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+import time
+
+from sqlalchemy import and_, event, or_, update
 from sqlmodel import Session, select
 
+from app.core.config import get_settings
 from app.db.models import Run, Site
-from app.plugins.base import PluginContext, PluginResult
+from app.plugins.base import PluginContext, PluginResult, SitePlugin, supports_batch
 from app.plugins.loader import load_configured_plugins
 from app.plugins.registry import get_registry
 from app.services.hooks import log_event
 from app.services.config_store import deserialize_config
 from app.services.cookiecloud_sync import CookieCloudSyncService
 from app.services.cookiecloud_injector import inject_cookiecloud_context
+from app.services.settings_store import load_ui_settings
+from app.services.result_data import dump_result_data
+from app.services.artifacts import ArtifactWriter
+from app.services.retry import is_retryable_exception, resolve_retry_policy, retry_delay
+from app.services.timing import RunTimer
 
 
 QUEUED_STATUS = "queued"
 RUNNING_STATUS = "running"
 SUCCESS_STATUS = "success"
 FAILED_STATUS = "failed"
+SKIPPED_STATUS = "skipped"
+
+# priority first, then the weighted-fair tag (served by the ix_run_claim index)
+CLAIM_ORDER = (Run.priority, Run.queue_tag, Run.id)
+# re-select after losing a claim race to another executor
+CLAIM_ATTEMPTS = 5
+
+
+def _claimable():
+    # delayed runs (retries) stay queued without holding an executor slot until not_before
+    return or_(Run.not_before == None, Run.not_before <= datetime.utcnow())  # noqa: E711
+
+def idempotency_window_start(window: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """Start of the current idempotency window as naive UTC, or None when not idempotent."""
+    if window not in {"daily", "hourly"}:
+        return None
+    try:
+        tz = ZoneInfo(load_ui_settings().get("timezone") or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        tz = timezone.utc
+    local = (now or datetime.utcnow()).replace(tzinfo=timezone.utc).astimezone(tz)
+    if window == "daily":
+        start = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        start = local.replace(minute=0, second=0, microsecond=0)
+    return start.astimezone(timezone.utc).replace(tzinfo=None)
 
 
 class RunExecutor:
     def __init__(self, session: Session):
         self.session = session
+        self.settings = get_settings()
+        self._timers: Dict[int, RunTimer] = {}
+        self._active_timer: Optional[RunTimer] = None
+        self._cpu_mark = time.thread_time()
+        self._commit_started: Optional[float] = None
+        event.listen(session, "before_commit", self._on_before_commit)
+        event.listen(session, "after_commit", self._on_after_commit)
 
     def claim_next_run(self) -> Optional[Run]:
-        statement = select(Run).where(Run.status == QUEUED_STATUS).order_by(Run.id)
-        run = self.session.exec(statement).first()
-        if not run:
-            return None
-        run.status = RUNNING_STATUS
-        run.started_at = datetime.utcnow()
-        self.session.add(run)
-        self.session.commit()
-        self.session.refresh(run)
-        return run
+        statement = select(Run).where(Run.status == QUEUED_STATUS, _claimable()).order_by(*CLAIM_ORDER)
+        for _ in range(CLAIM_ATTEMPTS):
+            run = self.session.exec(statement).first()
+            if not run:
+                return None
+            claimed = self._claim([run])
+            if claimed:
+                return claimed[0]
+        return None
+
+    def claim_next_batch(self) -> List[Run]:
+        """Claim the next queued run plus queued runs that can share its plugin call.
+
+        A batch is only formed when the plugin overrides ``run_batch``. While the group is
+        smaller than ``batch_max_size`` and its oldest run is younger than
+        ``batch_max_wait_seconds``, the group is held so later runs can join; the next run
+        outside it is claimed instead, so a waiting batch never stalls other runs.
+        """
+        held: Set[int] = set()
+        attempts = 0
+        while attempts < CLAIM_ATTEMPTS:
+            statement = select(Run).where(Run.status == QUEUED_STATUS, _claimable())
+            if held:
+                statement = statement.where(Run.id.not_in(held))
+            head = self.session.exec(statement.order_by(*CLAIM_ORDER)).first()
+            if not head:
+                return []
+            site = self.session.get(Site, head.site_id)
+            plugin = self._resolve_plugin(head, site)
+            if not site or not plugin or not supports_batch(plugin) or self.settings.batch_max_size <= 1:
+                members = [head]
+            else:
+                members = self._batch_candidates(head, site, plugin)
+                waited = (datetime.utcnow() - head.created_at).total_seconds()
+                if len(members) < self.settings.batch_max_size and waited < self.settings.batch_max_wait_seconds:
+                    held.update(run.id for run in members)
+                    continue
+            claimed = self._claim(members)
+            if claimed:
+                return claimed
+            attempts += 1
+        return []
 
     def execute_next(self) -> Optional[Run]:
-        run = self.claim_next_run()
-        if not run:
-            return None
+        runs = self.claim_next_batch()
+        return self.execute_claimed(runs) if runs else None
+
+    def execute_claimed(self, runs: List[Run]) -> Run:
+        """Execute runs returned by ``claim_next_batch``; returns the first one."""
+        if len(runs) > 1:
+            self._execute_batch(runs)
+            return runs[0]
+
+        run = runs[0]
+        site = self._start_run(run)
+        try:
+            succeeded_at = self._idempotent_success(run, site)
+            if succeeded_at:
+                self._skip_run(run, succeeded_at)
+                return run
+            result = self._execute_run(run, site)
+            self._finish_run(run, result)
+        except Exception as exc:
+            self._fail_run(run, exc)
+        return run
+
+    def _claim(self, runs: List[Run]) -> List[Run]:
+        """Move runs from queued to running; returns the ones this executor won.
+
+        Each update is conditional on the run still being queued, so concurrent executors
+        (threads or processes) never claim the same run; the first update takes SQLite's
+        write lock for the rest of the transaction.
+        """
+        now = datetime.utcnow()
+        won = set()
+        for run in runs:
+            result = self.session.execute(
+                update(Run)
+                .where(Run.id == run.id, Run.status == QUEUED_STATUS)
+                .values(status=RUNNING_STATUS, started_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                won.add(run.id)
+        self.session.commit()
+        claimed = [run for run in runs if run.id in won]
+        for run in claimed:
+            self.session.refresh(run)
+            self._timers[run.id] = RunTimer(run.created_at, run.started_at)
+        return claimed
+
+    def _timer(self, run: Run) -> RunTimer:
+        timer = self._timers.get(run.id)
+        if timer is None:
+            timer = self._timers[run.id] = RunTimer()
+        return timer
+
+    def _activate(self, timer: Optional[RunTimer]) -> None:
+        """Charge the thread CPU used since the last switch to the previously active run."""
+        now = time.thread_time()
+        if self._active_timer is not None:
+            self._active_timer.cpu_ms += (now - self._cpu_mark) * 1000
+        self._cpu_mark = now
+        self._active_timer = timer
+
+    def _pop_timings(self, run: Run) -> str:
+        # The final state commit is not included: it carries the timings themselves.
+        self._activate(None)
+        timer = self._timers.pop(run.id, None) or RunTimer()
+        return timer.dump()
 
+    def _on_before_commit(self, session) -> None:
+        self._commit_started = time.perf_counter()
+
+    def _on_after_commit(self, session) -> None:
+        if self._active_timer is not None and self._commit_started is not None:
+            self._active_timer.add("db_commit", (time.perf_counter() - self._commit_started) * 1000)
+        self._commit_started = None
+
+    def _batch_candidates(self, head: Run, site: Site, plugin: SitePlugin) -> List[Run]:
+        statement = (
+            select(Run)
+            .join(Site, Site.id == Run.site_id)
+            .where(Run.status == QUEUED_STATUS, _claimable())
+            .where(
+                or_(
+                    Run.plugin_key == plugin.key,
+                    and_(Run.plugin_key == None, Site.plugin_key == plugin.key),  # noqa: E711
+                )
+            )
+        )
+        if plugin.batch_by_cookie_domain:
+            if site.cookie_domain:
+                statement = statement.where(Site.cookie_domain == site.cookie_domain)
+            else:
+                statement = statement.where(Site.cookie_domain == None)  # noqa: E711
+        statement = statement.order_by(*CLAIM_ORDER).limit(self.settings.batch_max_size)
+        members = list(self.session.exec(statement).all())
+        if head.id not in {run.id for run in members}:
+            members = [head] + members[: self.settings.batch_max_size - 1]
+        return members
+
+    def _resolve_plugin(self, run: Run, site: Optional[Site]) -> Optional[SitePlugin]:
+        registry = get_registry()
+        if registry.is_empty():
+            load_configured_plugins()
+        return registry.get(run.plugin_key or (site.plugin_key if site else None))
+
+    def _start_run(self, run: Run) -> Optional[Site]:
+        self._activate(self._timer(run))
         site = self.session.get(Site, run.site_id)
         log_event(self.session, f"Run #{run.id} started", run_id=run.id, event="run.started")
         if site:
@@ -63,41 +240,163 @@ class RunExecutor:
                     event="run.cookiecloud",
                     payload={"uuid": site.cookiecloud_uuid},
                 )
+        return site
+
+    def _finish_run(self, run: Run, result: PluginResult) -> None:
+        run.status = SUCCESS_STATUS if result.ok else FAILED_STATUS
+        run.error = None if result.ok else result.message
+        run.result_data = dump_result_data(result.data, self.settings)
+        run.finished_at = datetime.utcnow()
+        run.timings = self._pop_timings(run)
+        self.session.add(run)
+        self._record_stats(run)
+        self.session.commit()
+        self.session.refresh(run)
+        # the run is final from here on: a failure below must not reach the caller's
+        # _fail_run, which would count the run twice and overwrite its error and timings
         try:
-            result = self._execute_run(run, site)
-            run.status = SUCCESS_STATUS if result.ok else FAILED_STATUS
-            run.error = None if result.ok else result.message
-            run.finished_at = datetime.utcnow()
-            self.session.add(run)
-            self.session.commit()
-            self.session.refresh(run)
             log_event(self.session, f"Run #{run.id} finished", run_id=run.id, event="run.finished")
-        except Exception as exc:
-            run.status = FAILED_STATUS
-            run.error = str(exc)
-            run.finished_at = datetime.utcnow()
-            self.session.add(run)
-            self.session.commit()
-            self.session.refresh(run)
+            if not result.ok and result.retryable:
+                self._schedule_retry(run, result.message)
+        except Exception as exc:  # noqa: BLE001
+            self._after_finish_failed(run, exc)
+
+    def _record_stats(self, run: Run) -> None:
+        # committed together with the final state
+        from app.services.stats import record_run
+
+        record_run(self.session, run)
+
+    def _skip_run(self, run: Run, succeeded_at: datetime) -> None:
+        run.status = SKIPPED_STATUS
+        run.error = None
+        run.finished_at = datetime.utcnow()
+        run.timings = self._pop_timings(run)
+        self.session.add(run)
+        self._record_stats(run)
+        self.session.commit()
+        self.session.refresh(run)
+        log_event(
+            self.session,
+            f"Run #{run.id} skipped: site already succeeded at {succeeded_at.isoformat()}",
+            run_id=run.id,
+            event="run.skipped",
+            payload={"site_id": run.site_id, "succeeded_at": succeeded_at.isoformat()},
+        )
+
+    def _idempotent_success(self, run: Run, site: Optional[Site]) -> Optional[datetime]:
+        """Return when the site last succeeded inside the plugin's idempotency window."""
+        if run.force or not site:
+            return None
+        plugin = self._resolve_plugin(run, site)
+        window_start = idempotency_window_start(plugin.idempotency) if plugin else None
+        if window_start is None:
+            return None
+        # one seek on ix_run_site_status_finished; reading the table keeps deleted and
+        # edited runs out of the answer
+        statement = (
+            select(Run.finished_at)
+            .where(Run.site_id == site.id)
+            .where(Run.status == SUCCESS_STATUS)
+            .where(Run.finished_at >= window_start)
+            .order_by(Run.finished_at.desc())
+            .limit(1)
+        )
+        return self.session.exec(statement).first()
+
+    def _fail_run(self, run: Run, exc: Exception) -> None:
+        run.status = FAILED_STATUS
+        run.error = str(exc)
+        run.finished_at = datetime.utcnow()
+        run.timings = self._pop_timings(run)
+        self.session.add(run)
+        self._record_stats(run)
+        self.session.commit()
+        self.session.refresh(run)
+        log_event(
+            self.session,
+            f"Run #{run.id} failed: {exc}",
+            level="error",
+            run_id=run.id,
+            event="run.failed",
+            payload={"error": str(exc)},
+        )
+        try:
+            self._schedule_retry(run, str(exc), exc=exc)
+        except Exception as retry_exc:  # noqa: BLE001
+            self._after_finish_failed(run, retry_exc)
+
+    def _after_finish_failed(self, run: Run, exc: Exception) -> None:
+        self.session.rollback()
+        try:
             log_event(
                 self.session,
-                f"Run #{run.id} failed: {exc}",
+                f"Run #{run.id} finished, but scheduling its retry failed: {exc}",
                 level="error",
                 run_id=run.id,
-                event="run.failed",
+                event="run.retry_failed",
                 payload={"error": str(exc)},
             )
-        return run
+        except Exception:  # noqa: BLE001 - the database itself is failing; nothing left to record
+            self.session.rollback()
+
+    def _schedule_retry(self, run: Run, reason: str, exc: Optional[Exception] = None) -> None:
+        """Queue the next attempt as a delayed run when the retry policy allows it."""
+        from app.services.run_queue import SOURCE_RETRY, QueueFull, submit_run
+
+        site = self.session.get(Site, run.site_id)
+        if not site:
+            return
+        policy = resolve_retry_policy(self._resolve_plugin(run, site), site)
+        if exc is not None and not is_retryable_exception(exc, policy):
+            return
+        if run.attempt >= policy.max_attempts:
+            if policy.max_attempts > 1:
+                log_event(
+                    self.session,
+                    f"Run #{run.id} gave up after {run.attempt} attempts",
+                    level="warning",
+                    run_id=run.id,
+                    event="run.retry_exhausted",
+                    payload={"attempt": run.attempt, "retry_of": run.retry_of},
+                )
+            return
+        delay = retry_delay(policy, run.attempt)
+        not_before = datetime.utcnow() + timedelta(seconds=delay)
+        try:
+            admission = submit_run(
+                self.session,
+                run.site_id,
+                force=run.force,
+                plugin_key=run.plugin_key,
+                plugin_config=run.plugin_config,
+                source=SOURCE_RETRY,
+                attempt=run.attempt + 1,
+                retry_of=run.retry_of or run.id,
+                not_before=not_before,
+            )
+        except QueueFull:
+            return
+        retry = admission.run
+        log_event(
+            self.session,
+            f"Run #{run.id} will be retried as run #{retry.id} after {delay:.0f}s: {reason}",
+            level="info",
+            run_id=run.id,
+            event="run.retry_scheduled",
+            payload={
+                "retry_run_id": retry.id,
+                "attempt": run.attempt + 1,
+                "retry_of": run.retry_of or run.id,
+                "not_before": not_before.isoformat(),
+                "coalesced": admission.coalesced,
+            },
+        )
 
     def _execute_run(self, run: Run, site: Optional[Site]) -> PluginResult:
         if not site:
             return PluginResult.failure("Site not found")
-        registry = get_registry()
-        if not registry.list():
-            load_configured_plugins()
-        plugin_key = run.plugin_key or site.plugin_key
-        plugin_config_raw = run.plugin_config or site.plugin_config
-        plugin = registry.get(plugin_key)
+        plugin = self._resolve_plugin(run, site)
         if not plugin:
             log_event(
                 self.session,
@@ -108,23 +407,110 @@ class RunExecutor:
                 payload={"site_id": site.id},
             )
             return PluginResult.failure("No plugin configured")
-        context = PluginContext(
+        context = self._build_context(run, site)
+        self._prepare_cookiecloud(run, site, context)
+        before_result = self._before_run(plugin, run, context)
+        if before_result and not before_result.ok:
+            return before_result
+        with self._timer(run).phase("run"):
+            result = plugin.run(context)
+        return self._after_run(plugin, run, context, result)
+
+    def _execute_batch(self, runs: List[Run]) -> None:
+        """Prepare every run of a batch, hand them to ``run_batch`` at once, then fan out."""
+        plugin = self._resolve_plugin(runs[0], self.session.get(Site, runs[0].site_id))
+        pending = []
+        synced: Set[str] = set()
+        for run in runs:
+            site = self._start_run(run)
+            if not site:
+                self._finish_run(run, PluginResult.failure("Site not found"))
+                continue
+            try:
+                succeeded_at = self._idempotent_success(run, site)
+                if succeeded_at:
+                    self._skip_run(run, succeeded_at)
+                    continue
+                context = self._build_context(run, site)
+                self._prepare_cookiecloud(run, site, context, synced=synced)
+                before_result = self._before_run(plugin, run, context)
+                if before_result and not before_result.ok:
+                    self._finish_run(run, before_result)
+                    continue
+                pending.append((run, context))
+            except Exception as exc:
+                self._fail_run(run, exc)
+        if not pending:
+            return
+
+        log_event(
+            self.session,
+            f"Plugin {plugin.key} batch of {len(pending)} runs",
+            level="info",
+            event="plugin.batch",
+            payload={"plugin_key": plugin.key, "run_ids": [run.id for run, _ in pending]},
+        )
+        self._activate(None)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            results = plugin.run_batch([context for _, context in pending])
+            if len(results) != len(pending):
+                raise ValueError(f"run_batch returned {len(results)} results for {len(pending)} runs")
+        except Exception as exc:
+            results = None
+            error = exc
+        # Each member is charged an equal share of the batch call.
+        share_wall = (time.perf_counter() - wall) * 1000 / len(pending)
+        share_cpu = (time.thread_time() - cpu) * 1000 / len(pending)
+        self._cpu_mark = time.thread_time()
+        for run, _ in pending:
+            timer = self._timer(run)
+            timer.add("run", share_wall)
+            timer.cpu_ms += share_cpu
+        if results is None:
+            for run, _ in pending:
+                self._activate(self._timer(run))
+                self._fail_run(run, error)
+            return
+
+        for (run, context), result in zip(pending, results):
+            self._activate(self._timer(run))
+            try:
+                self._finish_run(run, self._after_run(plugin, run, context, result))
+            except Exception as exc:
+                self._fail_run(run, exc)
+
+    def _build_context(self, run: Run, site: Site) -> PluginContext:
+        return PluginContext(
             run_id=run.id,
             site_id=site.id,
             site_name=site.name,
             site_url=site.url,
             cookie_domain=site.cookie_domain,
             cookiecloud_uuid=site.cookiecloud_uuid,
-            plugin_config=deserialize_config(plugin_config_raw),
+            plugin_config=deserialize_config(run.plugin_config or site.plugin_config),
             started_at=run.started_at or datetime.utcnow(),
             notes=site.notes,
+            artifacts=ArtifactWriter(self.session, run.id),
         )
 
+    def _prepare_cookiecloud(
+        self,
+        run: Run,
+        site: Site,
+        context: PluginContext,
+        *,
+        synced: Optional[Set[str]] = None,
+    ) -> None:
         # CookieCloud: sync before each run when uuid configured; inject selected domain cookies into context.
-        if site.cookiecloud_uuid:
+        # Within a batch each uuid is synced once and the cached snapshot is reused.
+        if not site.cookiecloud_uuid:
+            return
+        if synced is None or site.cookiecloud_uuid not in synced:
             try:
-                sync_service = CookieCloudSyncService()
-                sync_result = sync_service.sync(site.cookiecloud_uuid)
+                with self._timer(run).phase("cookie_sync"):
+                    sync_service = CookieCloudSyncService()
+                    sync_result = sync_service.sync(site.cookiecloud_uuid)
                 log_event(
                     self.session,
                     f"CookieCloud checked for {site.cookiecloud_uuid} (updated={sync_result.get('cache_updated')})",
@@ -145,13 +531,18 @@ class RunExecutor:
                     event="cookiecloud.sync_failed",
                     payload={"uuid": site.cookiecloud_uuid, "error": str(exc)},
                 )
+            if synced is not None:
+                synced.add(site.cookiecloud_uuid)
 
-            # Inject cookies from local cache (if cookie_domain present)
+        # Inject cookies from local cache (if cookie_domain present)
+        with self._timer(run).phase("inject"):
             inject_cookiecloud_context(
                 context,
                 uuid=site.cookiecloud_uuid,
                 cookie_domain=site.cookie_domain,
             )
+
+    def _before_run(self, plugin: SitePlugin, run: Run, context: PluginContext) -> Optional[PluginResult]:
         log_event(
             self.session,
             f"Plugin {plugin.key} started",
@@ -160,7 +551,8 @@ class RunExecutor:
             event="plugin.started",
             payload={"plugin_key": plugin.key},
         )
-        before_result = plugin.before_run(context)
+        with self._timer(run).phase("before_run"):
+            before_result = plugin.before_run(context)
         if before_result:
             log_event(
                 self.session,
@@ -170,9 +562,15 @@ class RunExecutor:
                 event="plugin.before",
                 payload={"plugin_key": plugin.key, "ok": before_result.ok},
             )
-            if not before_result.ok:
-                return before_result
-        result = plugin.run(context)
+        return before_result
+
+    def _after_run(
+        self,
+        plugin: SitePlugin,
+        run: Run,
+        context: PluginContext,
+        result: PluginResult,
+    ) -> PluginResult:
         log_event(
             self.session,
             f"Plugin run: {result.message}",
@@ -181,7 +579,8 @@ class RunExecutor:
             event="plugin.run",
             payload={"plugin_key": plugin.key, "ok": result.ok},
         )
-        after_result = plugin.after_run(context, result)
+        with self._timer(run).phase("after_run"):
+            after_result = plugin.after_run(context, result)
         if after_result:
             log_event(
                 self.session,
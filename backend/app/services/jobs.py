@@ -1,95 +1,290 @@
 """Cron-based job mapping to sites."""
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional, List
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Optional, List, Tuple
 
-from apscheduler.triggers.cron import CronTrigger
 from sqlmodel import Session, select
 
+from app.core.config import get_settings
 from app.db.models import Site, Run
 from app.services.hooks import log_event
+from app.services.leader import is_scheduler_leader
+from app.services.dispatcher import notify_dispatcher
+from app.services.run_queue import (
+    SOURCE_MANUAL,
+    SOURCE_SCHEDULED,
+    Admission,
+    BulkAdmission,
+    QueueFull,
+    submit_run,
+    submit_runs,
+)
+from app.services.schedule import affected_sites, assign_offsets, normalize_cron, site_trigger
+from app.services.site_changes import changes_since, latest_change_id, prune_site_changes
 
 
-def register_site_jobs(scheduler, session: Session) -> List[str]:
-    if scheduler is None:
-        return []
+JOB_PREFIX = "site:"
+CHANGE_RETENTION = timedelta(days=7)
+
+
+def _job_id(site_id: int) -> str:
+    return f"{JOB_PREFIX}{site_id}"
+
+
+def _cron_hash(cron_expr: str, offset: int = 0) -> str:
+    return hashlib.sha1(f"{cron_expr}+{offset}".encode("utf-8")).hexdigest()[:12]
+
+
+class SiteJobReconciler:
+    """Keep APScheduler site jobs in sync with the site change feed.
+
+    The first pass schedules every enabled site; after that each tick only reads change
+    events newer than the last one seen and adds, reschedules or removes the affected jobs.
+    Jobs are keyed by a hash of their cron expression and spread offset, so unchanged jobs
+    are left alone. Offsets depend on every site sharing a cron, so a change re-evaluates
+    the cron groups the site left and joined.
+    """
 
-    existing = {job.id for job in scheduler.get_jobs()}
-    valid_job_ids = set()
+    def __init__(self) -> None:
+        self.scheduler = None
+        self.last_change_id: Optional[int] = None
+        self.job_hashes: Dict[str, str] = {}
+        self.job_crons: Dict[int, str] = {}
+        self.last_pruned: Optional[datetime] = None
 
-    for site in session.exec(select(Site).where(Site.enabled == True)):  # noqa: E712
-        if not site.notes:
-            continue
-        cron_expr = _extract_cron(site.notes)
+    def reconcile(self, scheduler, session: Session) -> List[str]:
+        if scheduler is not self.scheduler:
+            self.scheduler = scheduler
+            self.last_change_id = None
+            self.job_hashes = {}
+            self.job_crons = {}
+        if self.last_change_id is None:
+            return self._full_sync(session)
+
+        changes = changes_since(session, self.last_change_id)
+        if not changes:
+            return []
+        self.last_change_id = changes[-1][0]
+        changed = {site_id: session.get(Site, site_id) for _, site_id in changes}
+        previous = [self.job_crons[site_id] for site_id in changed if site_id in self.job_crons]
+        sites, offsets = affected_sites(session, changed, previous)
+        touched = []
+        for site_id, site in sites.items():
+            if self._apply(session, site_id, site, offsets.get(site_id, 0)):
+                touched.append(_job_id(site_id))
+        self._prune(session)
+        return touched
+
+    def _full_sync(self, session: Session) -> List[str]:
+        # Read the feed position first so changes made during the scan are replayed.
+        self.last_change_id = latest_change_id(session)
+        touched = []
+        seen = set()
+        sites = list(session.exec(select(Site).where(Site.enabled == True)))  # noqa: E712
+        offsets = assign_offsets(sites)
+        for site in sites:
+            seen.add(_job_id(site.id))
+            if self._apply(session, site.id, site, offsets.get(site.id, 0)):
+                touched.append(_job_id(site.id))
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith(JOB_PREFIX) and job.id not in seen:
+                self.scheduler.remove_job(job.id)
+                self.job_hashes.pop(job.id, None)
+                self.job_crons.pop(int(job.id[len(JOB_PREFIX):]), None)
+        self._prune(session)
+        return touched
+
+    def _apply(self, session: Session, site_id: int, site: Optional[Site], offset: int = 0) -> bool:
+        job_id = _job_id(site_id)
+        cron_expr = normalize_cron(site.cron) if site and site.enabled else None
         if not cron_expr:
-            continue
-        job_id = f"site:{site.id}"
-        valid_job_ids.add(job_id)
-        if job_id in existing:
-            continue
+            return self._remove(session, site_id)
+        cron_hash = _cron_hash(cron_expr, offset)
+        if self.job_hashes.get(job_id) == cron_hash:
+            return False
         try:
-            trigger = CronTrigger.from_crontab(cron_expr)
+            trigger = site_trigger(site, offset)
         except ValueError:
             log_event(
                 session,
-                f"Invalid cron for site #{site.id}: '{cron_expr}'",
+                f"Invalid cron for site #{site_id}: '{cron_expr}'",
                 level="warning",
                 event="cron.invalid",
-                payload={"site_id": site.id, "cron": cron_expr},
+                payload={"site_id": site_id, "cron": cron_expr},
             )
-            continue
-        scheduler.add_job(enqueue_run, trigger, id=job_id, args=[site.id])
+            return self._remove(session, site_id)
+        rescheduled = job_id in self.job_hashes
+        self.scheduler.add_job(
+            enqueue_scheduled_run,
+            trigger,
+            id=job_id,
+            args=[site_id],
+            replace_existing=True,
+            # fires delayed while the process is up run once, late; downtime is handled by catchup
+            coalesce=True,
+            misfire_grace_time=max(get_settings().catchup_grace_minutes, 1) * 60,
+        )
+        self.job_hashes[job_id] = cron_hash
+        self.job_crons[site_id] = cron_expr
+        spread = f" +{offset}s" if offset else ""
+        log_event(
+            session,
+            f"{'Rescheduled' if rescheduled else 'Scheduled'} site #{site_id} ({site.name}) with cron '{cron_expr}'{spread}",
+            level="info",
+            event="cron.rescheduled" if rescheduled else "cron.scheduled",
+            payload={"site_id": site_id, "cron": cron_expr, "offset": offset},
+        )
+        return True
+
+    def _remove(self, session: Session, site_id: int) -> bool:
+        job_id = _job_id(site_id)
+        self.job_crons.pop(site_id, None)
+        if self.job_hashes.pop(job_id, None) is None:
+            return False
+        if self.scheduler.get_job(job_id):
+            self.scheduler.remove_job(job_id)
         log_event(
             session,
-            f"Scheduled site #{site.id} ({site.name}) with cron '{cron_expr}'",
+            f"Unscheduled site #{site_id}",
             level="info",
-            event="cron.scheduled",
-            payload={"site_id": site.id, "cron": cron_expr},
+            event="cron.removed",
+            payload={"site_id": site_id},
         )
+        return True
+
+    def _prune(self, session: Session) -> None:
+        now = datetime.utcnow()
+        if self.last_pruned and now - self.last_pruned < timedelta(hours=1):
+            return
+        self.last_pruned = now
+        prune_site_changes(session, CHANGE_RETENTION, keep_after=self.last_change_id)
 
-    for job_id in list(existing):
-        if job_id.startswith("site:") and job_id not in valid_job_ids:
-            scheduler.remove_job(job_id)
-    return list(existing)
 
+_reconciler = SiteJobReconciler()
 
-def enqueue_run(site_id: int) -> Run:
+
+def register_site_jobs(scheduler, session: Session) -> List[str]:
+    """Reconcile site cron jobs; returns the job ids that were added, changed or removed."""
+    if scheduler is None:
+        return []
+    return _reconciler.reconcile(scheduler, session)
+
+
+def enqueue_run(
+    site_id: int,
+    force: bool = False,
+    source: str = SOURCE_MANUAL,
+    fired_at: Optional[datetime] = None,
+    session: Optional[Session] = None,
+) -> Admission:
+    """Queue a run for a site; raises QueueFull when the overflow policy rejects it.
+
+    ``fired_at`` records a cron fire on the site (kept even when the queue rejects the run)
+    so the startup catch-up knows which windows were already handled. Without ``session``
+    a new one is opened.
+    """
+    if session is not None:
+        return _enqueue_run(session, site_id, force, source, fired_at)
     from app.db.session import engine
     with Session(engine) as session:
-        run = Run(site_id=site_id, status="queued", created_at=datetime.utcnow())
-        if site := session.get(Site, site_id):
-            run.plugin_key = site.plugin_key
-            run.plugin_config = site.plugin_config
-        session.add(run)
+        return _enqueue_run(session, site_id, force, source, fired_at)
+
+
+def _enqueue_run(
+    session: Session,
+    site_id: int,
+    force: bool,
+    source: str,
+    fired_at: Optional[datetime],
+) -> Admission:
+    site = session.get(Site, site_id)
+    if site and fired_at:
+        site.last_fired_at = fired_at
+        session.add(site)
         session.commit()
-        session.refresh(run)
+    admission = submit_run(
+        session,
+        site_id,
+        force=force,
+        plugin_key=site.plugin_key if site else None,
+        plugin_config=site.plugin_config if site else None,
+        source=source,
+    )
+    run = admission.run
+    if admission.coalesced:
+        log_event(
+            session,
+            f"Coalesced enqueue for site {site_id} into run #{run.id}",
+            level="info",
+            run_id=run.id,
+            event="run.coalesced",
+            payload={"site_id": site_id, "run_id": run.id, "force": force, "count": run.coalesced_count},
+        )
+    else:
         log_event(
             session,
             f"Enqueued run #{run.id} for site {site_id}",
             level="info",
             run_id=run.id,
             event="run.enqueued",
-            payload={"site_id": site_id, "run_id": run.id},
+            payload={"site_id": site_id, "run_id": run.id, "force": force, "source": source},
         )
-        return run
-
+    # logging committed again; load the run so callers can read it after the session closes
+    session.refresh(run)
+    return admission
 
-def _extract_cron(notes: str) -> Optional[str]:
-    for line in notes.splitlines():
-        line = line.strip()
-        if line.lower().startswith("cron:"):
-            return line.split("cron:", 1)[1].strip()
-    return None
 
+def enqueue_runs(
+    session: Session,
+    site_ids: Optional[List[int]] = None,
+    enabled: Optional[bool] = True,
+    plugin_key: Optional[str] = None,
+    force: bool = False,
+    source: str = SOURCE_MANUAL,
+) -> Tuple[List[Site], BulkAdmission]:
+    """Queue runs for every site matching the filter in one transaction.
 
-def validate_cron_expression(expr: str) -> Optional[str]:
-    if not expr:
-        return "Cron expression is required"
-    try:
-        CronTrigger.from_crontab(expr)
-    except ValueError as exc:
-        return str(exc)
-    return None
+    One summary log event replaces the per-site ones; the queue rules are those of
+    ``submit_runs`` (coalescing per site, only the overflow rejected).
+    """
+    statement = select(Site).order_by(Site.id)
+    if site_ids is not None:
+        statement = statement.where(Site.id.in_(site_ids))
+    if enabled is not None:
+        statement = statement.where(Site.enabled == enabled)
+    if plugin_key is not None:
+        statement = statement.where(Site.plugin_key == plugin_key)
+    sites = list(session.exec(statement).all())
+    admission = submit_runs(session, sites, force=force, source=source)
+    if sites:
+        log_event(
+            session,
+            f"Bulk enqueue for {len(sites)} site(s): {len(admission.enqueued)} queued, "
+            f"{len(admission.coalesced)} coalesced, {len(admission.rejected)} rejected",
+            level="warning" if admission.rejected else "info",
+            event="run.bulk_enqueued",
+            payload={
+                "source": source,
+                "force": force,
+                "enqueued": admission.enqueued,
+                "coalesced": admission.coalesced,
+                "rejected": admission.rejected,
+                "dropped": admission.dropped,
+            },
+        )
+    if admission.enqueued or admission.coalesced:
+        notify_dispatcher()
+    return sites, admission
 
 
+def enqueue_scheduled_run(site_id: int) -> None:
+    """Cron job entry point; a full queue is already logged, so it is not re-raised."""
+    if not is_scheduler_leader():
+        # lost the lease between the fire and now; the new leader owns this schedule
+        return
+    try:
+        enqueue_run(site_id, source=SOURCE_SCHEDULED, fired_at=datetime.utcnow())
+    except QueueFull:
+        pass
@@ -0,0 +1,232 @@
+"""Lease-based leader election so a single process runs the scheduler.
+
+Candidates race for a row in the ``lease`` table with one conditional UPDATE: it succeeds
+when the lease is free, expired, or already ours, so at most one holder exists at a time.
+The leader renews every ``LEADER_RENEW_SECONDS``; if it dies, a standby takes over once
+``LEADER_LEASE_SECONDS`` pass without renewal. A clean shutdown releases the lease, so
+standbys take over on their next poll.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import case, insert, or_, update
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.db.models import Lease
+from app.services.hooks import log_event
+
+SCHEDULER_LEASE = "scheduler"
+
+
+def holder_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class LeaderElector:
+    def __init__(
+        self,
+        engine,
+        name: str,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+        lease_seconds: float = 30.0,
+        renew_seconds: float = 10.0,
+    ):
+        self.engine = engine
+        self.name = name
+        self.holder = holder_id()
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.lease_seconds = max(lease_seconds, 1.0)
+        # renew well inside the lease so one slow renewal does not lose it
+        self.renew_seconds = min(max(renew_seconds, 0.1), self.lease_seconds / 2)
+        self.is_leader = False
+        self._last_renewed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"leader-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.lease_seconds)
+            self._thread = None
+        if self.is_leader:
+            self._demote("shutdown")
+        self._release()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.campaign()
+            wait = self.renew_seconds
+            if self.is_leader:
+                # wake up by the demotion deadline even if the last renewal was slow
+                deadline = self._last_renewed + self.lease_seconds - self.renew_seconds
+                wait = max(min(wait, deadline - time.monotonic()), 0.0)
+            self._stop.wait(wait)
+
+    def campaign(self) -> bool:
+        """Acquire or renew the lease once; promotes or demotes this process as needed."""
+        # taken before the UPDATE: the lease written below expires lease_seconds after this
+        attempted = time.monotonic()
+        try:
+            won = self._try_acquire(datetime.utcnow())
+        except Exception:  # noqa: BLE001 - a locked/unavailable DB counts as not renewed
+            won = None
+        if won:
+            self._last_renewed = attempted
+            if not self.is_leader:
+                self._promote()
+        elif self.is_leader:
+            if won is False:
+                self._demote("lease taken over")
+            elif time.monotonic() - self._last_renewed >= self.lease_seconds - self.renew_seconds:
+                # the next check would come after the lease expired and a standby may already
+                # lead by then; stop one renew interval early
+                self._demote("lease not renewed")
+        return self.is_leader
+
+    def _try_acquire(self, now: datetime) -> bool:
+        expires = now + timedelta(seconds=self.lease_seconds)
+        with Session(self.engine) as session:
+            session.execute(
+                insert(Lease)
+                .prefix_with("OR IGNORE")
+                .values(name=self.name, holder=self.holder, acquired_at=now, renewed_at=now, expires_at=expires)
+            )
+            result = session.execute(
+                update(Lease)
+                .where(Lease.name == self.name, or_(Lease.holder == self.holder, Lease.expires_at < now))
+                .values(
+                    holder=self.holder,
+                    acquired_at=case((Lease.holder == self.holder, Lease.acquired_at), else_=now),
+                    renewed_at=now,
+                    expires_at=expires,
+                )
+            )
+            session.commit()
+            return result.rowcount == 1
+
+    def _release(self) -> None:
+        try:
+            with Session(self.engine) as session:
+                session.execute(
+                    update(Lease)
+                    .where(Lease.name == self.name, Lease.holder == self.holder)
+                    .values(expires_at=datetime.utcnow())
+                )
+                session.commit()
+        except Exception:  # noqa: BLE001 - the lease expires on its own
+            return
+
+    def _promote(self) -> None:
+        self.is_leader = True
+        self._log(f"{self.holder} became {self.name} leader", "leader.elected")
+        try:
+            self.on_elected()
+        except Exception as exc:  # noqa: BLE001 - a leader that schedules nothing must not keep the lease
+            self._log(
+                f"{self.holder} failed to start as {self.name} leader: {exc}",
+                "leader.start_failed",
+                repr(exc),
+                level="error",
+            )
+            self._demote("start failed")
+            # let a standby (or our next campaign) take over right away
+            self._release()
+
+    def _demote(self, reason: str) -> None:
+        self.is_leader = False
+        try:
+            self.on_demoted()
+        except Exception as exc:  # noqa: BLE001 - stepping down must finish
+            self._log(
+                f"{self.holder} failed to stop as {self.name} leader: {exc}",
+                "leader.stop_failed",
+                repr(exc),
+                level="error",
+            )
+        self._log(f"{self.holder} stepped down as {self.name} leader: {reason}", "leader.demoted", reason)
+
+    def _log(self, message: str, event: str, reason: Optional[str] = None, level: str = "info") -> None:
+        try:
+            with Session(self.engine) as session:
+                log_event(
+                    session,
+                    message,
+                    level=level,
+                    event=event,
+                    payload={"lease": self.name, "holder": self.holder, "reason": reason},
+                )
+        except Exception:  # noqa: BLE001 - logging must not break failover
+            return
+
+
+_elector: Optional[LeaderElector] = None
+
+
+def get_elector() -> Optional[LeaderElector]:
+    return _elector
+
+
+def start_elector(engine, on_elected: Callable[[], None], on_demoted: Callable[[], None]) -> LeaderElector:
+    global _elector
+    if _elector is None:
+        settings = get_settings()
+        _elector = LeaderElector(
+            engine,
+            SCHEDULER_LEASE,
+            on_elected,
+            on_demoted,
+            lease_seconds=settings.leader_lease_seconds,
+            renew_seconds=settings.leader_renew_seconds,
+        )
+        _elector.start()
+    return _elector
+
+
+def stop_elector() -> None:
+    global _elector
+    if _elector is not None:
+        _elector.stop()
+        _elector = None
+
+
+def is_scheduler_leader() -> bool:
+    """False only when this process runs an elector and is not the leader."""
+    return _elector is None or _elector.is_leader
+
+
+def lease_status(session: Session, name: str = SCHEDULER_LEASE) -> Dict[str, object]:
+    lease = session.get(Lease, name)
+    now = datetime.utcnow()
+    status: Dict[str, object] = {
+        "leader": None,
+        "lease_age_seconds": None,
+        "renewed_seconds_ago": None,
+        "expires_in_seconds": None,
+        "this_process": _elector.holder if _elector else None,
+        "is_leader": bool(_elector and _elector.is_leader),
+    }
+    if lease and lease.expires_at > now:
+        status.update(
+            leader=lease.holder,
+            lease_age_seconds=round((now - lease.acquired_at).total_seconds(), 1),
+            renewed_seconds_ago=round((now - lease.renewed_at).total_seconds(), 1),
+            expires_in_seconds=round((lease.expires_at - now).total_seconds(), 1),
+        )
+    return status
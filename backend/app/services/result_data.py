@@ -0,0 +1,102 @@
+"""Storage format of ``PluginResult.data`` on runs.
+
+``run.result_data`` holds compact JSON. Past ``RESULT_DATA_COMPRESS_BYTES`` it is zlib
+compressed and base64 encoded behind a ``z:`` prefix (only when that is smaller), so the
+column stays text and exports stay readable.
+
+Caps keep one chatty plugin from bloating the run table: strings longer than
+``RESULT_DATA_MAX_STRING`` are cut with a ``…[+N chars]`` marker, and when the JSON is still
+over ``RESULT_DATA_MAX_BYTES`` top-level keys are dropped from the end until it fits. A
+``_truncated`` key then records what was cut. 0 disables a cap.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+from app.core.config import Settings, get_settings
+
+TRUNCATED_KEY = "_truncated"
+COMPRESSED_PREFIX = "z:"
+# dropped key names listed in the marker
+MAX_DROPPED_KEYS = 20
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _cap_strings(value: Any, limit: int, counter: List[int]) -> Any:
+    if isinstance(value, str):
+        if limit > 0 and len(value) > limit:
+            counter[0] += 1
+            return f"{value[:limit]}…[+{len(value) - limit} chars]"
+        return value
+    if isinstance(value, dict):
+        return {str(key): _cap_strings(item, limit, counter) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_cap_strings(item, limit, counter) for item in value]
+    return value
+
+
+def _fit(data: Dict[str, Any], limit: int, marker: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep leading top-level keys while the JSON, marker included, fits in ``limit`` bytes."""
+    dropped: List[str] = []
+    kept: Dict[str, Any] = {}
+    used = _size(_dumps({TRUNCATED_KEY: {**marker, "dropped_keys": []}}))
+    for key, value in data.items():
+        entry = _size(_dumps({key: value})) - 1  # "{...}" minus braces, plus the comma
+        if not dropped and used + entry <= limit:
+            kept[key] = value
+            used += entry
+        else:
+            dropped.append(key)
+    while kept:
+        result = {**kept, TRUNCATED_KEY: {**marker, "dropped_keys": dropped[:MAX_DROPPED_KEYS]}}
+        if _size(_dumps(result)) <= limit:
+            return result
+        dropped.insert(0, kept.popitem()[0])
+    return {TRUNCATED_KEY: {**marker, "dropped_keys": dropped[:MAX_DROPPED_KEYS]}}
+
+
+def dump_result_data(data: Optional[Dict[str, Any]], settings: Optional[Settings] = None) -> Optional[str]:
+    """Serialized, capped and possibly compressed ``data``; None when there is nothing to keep."""
+    if not data:
+        return None
+    settings = settings or get_settings()
+    counter = [0]
+    capped = _cap_strings(dict(data), settings.result_data_max_string, counter)
+    text = _dumps(capped)
+    marker: Dict[str, Any] = {}
+    if counter[0]:
+        marker["strings"] = counter[0]
+    limit = settings.result_data_max_bytes
+    if limit > 0 and _size(text) > limit:
+        marker["bytes"] = _size(text)
+        text = _dumps(_fit(capped, limit, marker))
+    elif marker:
+        text = _dumps({**capped, TRUNCATED_KEY: marker})
+    threshold = settings.result_data_compress_bytes
+    if threshold > 0 and _size(text) > threshold:
+        packed = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(text.encode("utf-8"), 6)).decode("ascii")
+        if len(packed) < _size(text):
+            return packed
+    return text
+
+
+def load_result_data(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not raw:
+        return None
+    try:
+        if raw.startswith(COMPRESSED_PREFIX):
+            raw = zlib.decompress(base64.b64decode(raw[len(COMPRESSED_PREFIX):])).decode("utf-8")
+        data = json.loads(raw)
+    except (ValueError, zlib.error):
+        return None
+    return data if isinstance(data, dict) else None
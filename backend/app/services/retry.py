@@ -0,0 +1,44 @@
+"""Retry policy resolution and backoff for failed runs."""
+from __future__ import annotations
+
+import random
+from dataclasses import fields, replace
+from typing import Optional
+
+import requests
+
+from app.db.models import Site
+from app.plugins.base import RetryPolicy, SitePlugin
+from app.services.config_store import deserialize_config
+
+
+# Failures that usually go away on their own.
+TRANSIENT_EXCEPTIONS = (
+    ConnectionError,
+    TimeoutError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+
+
+def resolve_retry_policy(plugin: Optional[SitePlugin], site: Optional[Site]) -> RetryPolicy:
+    """The plugin's policy with any fields set in the site's ``retry_policy`` applied."""
+    policy = getattr(plugin, "retry_policy", None) or RetryPolicy()
+    overrides = deserialize_config(site.retry_policy) if site else None
+    if overrides:
+        known = {item.name for item in fields(RetryPolicy)}
+        policy = replace(policy, **{key: value for key, value in overrides.items() if key in known})
+    return policy
+
+
+def is_retryable_exception(exc: Exception, policy: RetryPolicy) -> bool:
+    return policy.retry_on_exception and isinstance(exc, TRANSIENT_EXCEPTIONS)
+
+
+def retry_delay(policy: RetryPolicy, attempt: int) -> float:
+    """Seconds to wait before attempt ``attempt + 1``."""
+    delay = policy.backoff_seconds * policy.backoff_factor ** max(attempt - 1, 0)
+    delay = min(delay, policy.max_backoff_seconds)
+    if policy.jitter:
+        delay *= 1 + random.uniform(-policy.jitter, policy.jitter)
+    return max(delay, 0.0)
@@ -0,0 +1,454 @@
+"""Run queue admission: per-site coalescing and queue-depth backpressure."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import and_, delete, func, or_, update
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.db.models import Run, Site
+from app.plugins.registry import get_registry
+from app.services.dispatcher import notify_dispatcher
+from app.services.executor import QUEUED_STATUS, RUNNING_STATUS, SKIPPED_STATUS
+from app.services.hooks import log_event
+
+
+OVERFLOW_POLICIES = ("reject", "drop_oldest", "merge")
+
+SOURCE_MANUAL = "manual"
+SOURCE_SCHEDULED = "scheduled"
+SOURCE_RETRY = "retry"
+# lower values are claimed first
+PRIORITIES = {SOURCE_MANUAL: 0, SOURCE_SCHEDULED: 1, SOURCE_RETRY: 2}
+DROPPED_ERROR = "Dropped: queue full"
+
+# requests rejected by this process since start (rejections leave no row behind)
+_rejected = 0
+
+
+class QueueFull(Exception):
+    """The queue is at ``QUEUE_MAX_DEPTH`` and the overflow policy refused the run."""
+
+
+@dataclass
+class Admission:
+    run: Run
+    # the request was folded into an existing run instead of creating one
+    coalesced: bool = False
+    # queued runs dropped to make room (drop_oldest policy)
+    dropped: List[int] = field(default_factory=list)
+
+
+@dataclass
+class BulkAdmission:
+    # site id -> run id
+    enqueued: Dict[int, int] = field(default_factory=dict)
+    coalesced: Dict[int, int] = field(default_factory=dict)
+    # sites left without a run because the queue was full
+    rejected: List[int] = field(default_factory=list)
+    dropped: List[int] = field(default_factory=list)
+
+
+def queue_depth(session: Session) -> int:
+    return session.exec(select(func.count()).select_from(Run).where(Run.status == QUEUED_STATUS)).one()
+
+
+def submit_run(
+    session: Session,
+    site_id: int,
+    *,
+    force: bool = False,
+    plugin_key: Optional[str] = None,
+    plugin_config: Optional[str] = None,
+    source: str = SOURCE_MANUAL,
+    attempt: int = 1,
+    retry_of: Optional[int] = None,
+    not_before: Optional[datetime] = None,
+) -> Admission:
+    """Queue a run for a site, honoring coalescing and the queue-depth limit.
+
+    With ``QUEUE_COALESCE`` a request for a site that already has an identical queued run
+    (same plugin and config) returns that run and bumps its ``coalesced_count``; ``force``
+    is carried over, and an immediate request pulls a delayed (retry) run forward. When ``QUEUE_MAX_DEPTH`` is reached the overflow policy decides:
+    ``reject`` raises QueueFull, ``drop_oldest`` skips the oldest queued runs and
+    ``merge`` folds the request into the site's queued or running run (rejecting when the
+    site has none).
+
+    New runs are claimed by ``priority`` (manual, then scheduled, then retry) and then by
+    ``queue_tag``, a start-time fair queuing tag per plugin flow: each run's tag is one
+    ``1 / queue_weight`` step after the later of the flow's (and site's) last queued run
+    and the current queue head, so a bulk enqueue for one plugin interleaves with other
+    plugins instead of running ahead of them.
+    """
+    global _rejected
+    settings = get_settings()
+    priority = PRIORITIES.get(source, PRIORITIES[SOURCE_MANUAL])
+    merge = dict(force=force, priority=priority, immediate=not_before is None)
+    if settings.queue_coalesce:
+        run = _coalesce(session, site_id, plugin_key, plugin_config, (QUEUED_STATUS,), **merge)
+        if run:
+            return Admission(run=run, coalesced=True)
+
+    dropped: List[int] = []
+    limit = settings.queue_max_depth
+    depth = queue_depth(session) if limit > 0 else 0
+    if limit > 0 and depth >= limit:
+        policy = settings.queue_overflow_policy
+        if policy not in OVERFLOW_POLICIES:
+            policy = "reject"
+        if policy == "drop_oldest":
+            dropped = _drop_oldest(session, depth - limit + 1)
+        else:
+            if policy == "merge":
+                run = _coalesce(session, site_id, plugin_key, plugin_config, (QUEUED_STATUS, RUNNING_STATUS), **merge)
+                if run:
+                    return Admission(run=run, coalesced=True)
+            session.rollback()
+            _rejected += 1
+            log_event(
+                session,
+                f"Run for site {site_id} rejected: queue is full ({depth}/{limit})",
+                level="warning",
+                event="queue.rejected",
+                payload={"site_id": site_id, "depth": depth, "max_depth": limit, "policy": policy},
+            )
+            raise QueueFull(f"Run queue is full ({depth}/{limit})")
+
+    flow = plugin_key
+    if flow is None:
+        site = session.get(Site, site_id)
+        flow = site.plugin_key if site else None
+    flow = flow or f"site:{site_id}"
+    run = Run(
+        site_id=site_id,
+        status=QUEUED_STATUS,
+        plugin_key=plugin_key,
+        plugin_config=plugin_config,
+        force=force,
+        source=source,
+        priority=priority,
+        queue_flow=flow,
+        queue_tag=_fair_tag(session, site_id, flow),
+        attempt=attempt,
+        retry_of=retry_of,
+        not_before=not_before,
+        created_at=datetime.utcnow(),
+    )
+    session.add(run)
+    session.commit()
+    session.refresh(run)
+    if dropped:
+        log_event(
+            session,
+            f"Dropped {len(dropped)} queued run(s) to admit run #{run.id}: queue is full",
+            level="warning",
+            event="queue.dropped",
+            payload={"run_ids": dropped, "admitted": run.id, "max_depth": limit},
+        )
+        session.refresh(run)
+    if not_before is None:
+        notify_dispatcher()
+    return Admission(run=run, dropped=dropped)
+
+
+def submit_runs(
+    session: Session,
+    sites: Sequence[Site],
+    *,
+    force: bool = False,
+    source: str = SOURCE_MANUAL,
+) -> BulkAdmission:
+    """Queue one run per site with its plugin and config, without committing.
+
+    The rules of ``submit_run`` applied to the whole batch with a handful of statements:
+    sites with an identical queued run are coalesced into it, the rest get new runs with
+    fair tags computed in memory. When the batch does not fit under ``QUEUE_MAX_DEPTH``
+    only the sites beyond the limit are rejected (``merge`` first folds them into queued
+    or running runs, ``drop_oldest`` first skips older queued runs). The caller commits,
+    so the batch lands in one transaction.
+
+    The depth is read before the write lock is taken, so another process may enqueue in
+    between; once the inserts hold the lock the depth is counted again and any runs over
+    the limit are taken back out and rejected, whatever the overflow policy.
+    """
+    global _rejected
+    settings = get_settings()
+    priority = PRIORITIES.get(source, PRIORITIES[SOURCE_MANUAL])
+    result = BulkAdmission()
+    pending = list(sites)
+    if settings.queue_coalesce and pending:
+        pending = _coalesce_many(session, pending, (QUEUED_STATUS,), force=force, priority=priority, into=result.coalesced)
+
+    limit = settings.queue_max_depth
+    if limit > 0 and pending:
+        room = limit - queue_depth(session)
+        if len(pending) > room:
+            policy = settings.queue_overflow_policy
+            if policy == "drop_oldest":
+                result.dropped = _drop_oldest(session, len(pending) - max(room, 0), keep=result.coalesced.values())
+                room += len(result.dropped)
+            overflow = pending[max(room, 0):]
+            pending = pending[: max(room, 0)]
+            if policy == "merge":
+                overflow = _coalesce_many(
+                    session, overflow, (QUEUED_STATUS, RUNNING_STATUS), force=force, priority=priority, into=result.coalesced
+                )
+            result.rejected = [site.id for site in overflow]
+            _rejected += len(overflow)
+
+    if pending:
+        head = session.exec(select(func.min(Run.queue_tag)).where(Run.status == QUEUED_STATUS)).one() or 0.0
+        flow_last = dict(
+            session.exec(
+                select(Run.queue_flow, func.max(Run.queue_tag)).where(Run.status == QUEUED_STATUS).group_by(Run.queue_flow)
+            ).all()
+        )
+        site_last = dict(
+            session.exec(
+                select(Run.site_id, func.max(Run.queue_tag))
+                .where(Run.status == QUEUED_STATUS, Run.site_id.in_([site.id for site in pending]))
+                .group_by(Run.site_id)
+            ).all()
+        )
+        now = datetime.utcnow()
+        runs = []
+        for site in pending:
+            flow = site.plugin_key or f"site:{site.id}"
+            # same tag as sequential submit_run calls would assign
+            tag = max(head, flow_last.get(flow) or 0.0, site_last.get(site.id) or 0.0) + _tag_step(flow)
+            flow_last[flow] = site_last[site.id] = tag
+            runs.append(
+                Run(
+                    site_id=site.id,
+                    status=QUEUED_STATUS,
+                    plugin_key=site.plugin_key,
+                    plugin_config=site.plugin_config,
+                    force=force,
+                    source=source,
+                    priority=priority,
+                    queue_flow=flow,
+                    queue_tag=tag,
+                    created_at=now,
+                )
+            )
+        session.add_all(runs)
+        session.flush()
+        if limit > 0:
+            # no other writer can enqueue until our commit, so this count is exact
+            excess = min(queue_depth(session) - limit, len(runs))
+            if excess > 0:
+                late, runs = runs[-excess:], runs[:-excess]
+                session.execute(
+                    delete(Run).where(Run.id.in_([run.id for run in late])).execution_options(synchronize_session=False)
+                )
+                for run in late:
+                    session.expunge(run)
+                result.rejected.extend(run.site_id for run in late)
+                _rejected += len(late)
+        result.enqueued = {run.site_id: run.id for run in runs}
+    return result
+
+
+def queue_stats(session: Session) -> Dict[str, object]:
+    settings = get_settings()
+    queued = session.exec(
+        select(func.count(), func.min(Run.created_at), func.coalesce(func.sum(Run.coalesced_count), 0))
+        .select_from(Run)
+        .where(Run.status == QUEUED_STATUS)
+    ).one()
+    coalesced_total = session.exec(select(func.coalesce(func.sum(Run.coalesced_count), 0)).select_from(Run)).one()
+    delayed = session.exec(
+        select(func.count()).select_from(Run).where(Run.status == QUEUED_STATUS, Run.not_before > datetime.utcnow())
+    ).one()
+    dropped = session.exec(
+        select(func.count()).select_from(Run).where(Run.status == SKIPPED_STATUS, Run.error == DROPPED_ERROR)
+    ).one()
+    return {
+        "depth": queued[0],
+        # waiting for their not_before (retries); they do not hold an executor slot
+        "delayed": delayed,
+        "oldest_queued_at": queued[1],
+        "max_depth": settings.queue_max_depth,
+        "overflow_policy": settings.queue_overflow_policy,
+        "coalesce": settings.queue_coalesce,
+        "coalesced": queued[2],
+        "coalesced_total": coalesced_total,
+        "dropped_total": dropped,
+        "rejected": _rejected,
+    }
+
+
+def queue_position(session: Session, run: Run) -> Dict[str, object]:
+    """How many queued runs are claimed before ``run`` and a rough start estimate."""
+    if run.status != QUEUED_STATUS:
+        return {"run_id": run.id, "status": run.status, "position": None, "ahead": 0, "estimated_start_at": None}
+    ahead = session.exec(
+        select(func.count())
+        .select_from(Run)
+        .where(Run.status == QUEUED_STATUS)
+        .where(
+            or_(
+                Run.priority < run.priority,
+                and_(Run.priority == run.priority, Run.queue_tag < run.queue_tag),
+                and_(Run.priority == run.priority, Run.queue_tag == run.queue_tag, Run.id < run.id),
+            )
+        )
+    ).one()
+    # Runs ahead are shared between the dispatcher's workers.
+    workers = max(get_settings().executor_concurrency, 1)
+    service = max(_average_run_seconds(session), 1.0)
+    estimate = datetime.utcnow() + timedelta(seconds=ahead * service / workers)
+    if run.not_before and run.not_before > estimate:
+        estimate = run.not_before
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "position": ahead + 1,
+        "ahead": ahead,
+        "estimated_start_at": estimate,
+        "service_seconds": round(service, 1),
+    }
+
+
+def _tag_step(flow: str) -> float:
+    # no registry.get(): that imports lazily discovered plugins, which the API never needs
+    registry = get_registry()
+    plugin = registry.plugins.get(flow)
+    if plugin is not None:
+        weight = getattr(plugin, "queue_weight", 1.0)
+    else:
+        entry = registry.lazy.get(flow)
+        weight = entry.meta.get("queue_weight", 1.0) if entry else 1.0
+    try:
+        weight = float(weight or 1.0)
+    except (TypeError, ValueError):
+        weight = 1.0
+    return 1.0 / max(weight, 0.01)
+
+
+def _fair_tag(session: Session, site_id: int, flow: str) -> float:
+    head = session.exec(select(func.min(Run.queue_tag)).where(Run.status == QUEUED_STATUS)).one()
+    flow_last = session.exec(
+        select(func.max(Run.queue_tag)).where(Run.status == QUEUED_STATUS, Run.queue_flow == flow)
+    ).one()
+    site_last = session.exec(
+        select(func.max(Run.queue_tag)).where(Run.site_id == site_id, Run.status == QUEUED_STATUS)
+    ).one()
+    start = max(head or 0.0, flow_last or 0.0, site_last or 0.0)
+    return start + _tag_step(flow)
+
+
+def _average_run_seconds(session: Session, sample: int = 100) -> float:
+    recent = (
+        select((func.julianday(Run.finished_at) - func.julianday(Run.started_at)).label("duration"))
+        .where(Run.finished_at != None, Run.started_at != None)  # noqa: E711
+        .order_by(Run.id.desc())
+        .limit(sample)
+        .subquery()
+    )
+    days = session.exec(select(func.avg(recent.c.duration))).one()
+    return max((days or 0.0) * 86400, 0.0)
+
+
+def _coalesce(
+    session: Session,
+    site_id: int,
+    plugin_key: Optional[str],
+    plugin_config: Optional[str],
+    statuses: Sequence[str],
+    *,
+    force: bool,
+    priority: int,
+    immediate: bool,
+) -> Optional[Run]:
+    # A single UPDATE both finds the target and takes SQLite's write lock, so a concurrent
+    # submit for the same site waits and then coalesces instead of inserting a duplicate.
+    candidate = aliased(Run)
+    target = (
+        select(candidate.id)
+        .where(candidate.site_id == site_id)
+        .where(candidate.status.in_(statuses))
+        .where(candidate.plugin_key.is_(plugin_key) if plugin_key is None else candidate.plugin_key == plugin_key)
+        .where(
+            candidate.plugin_config.is_(plugin_config) if plugin_config is None else candidate.plugin_config == plugin_config
+        )
+        .order_by(candidate.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    values = {"coalesced_count": Run.coalesced_count + 1, "priority": func.min(Run.priority, priority)}
+    if force:
+        values["force"] = True
+    if immediate:
+        values["not_before"] = None
+    result = session.execute(
+        update(Run).where(Run.id == target).values(**values).execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        return None
+    run = session.exec(select(Run).where(Run.id == target).execution_options(populate_existing=True)).one()
+    session.commit()
+    session.refresh(run)
+    return run
+
+
+def _coalesce_many(
+    session: Session,
+    sites: Sequence[Site],
+    statuses: Sequence[str],
+    *,
+    force: bool,
+    priority: int,
+    into: Dict[int, int],
+) -> List[Site]:
+    """Bulk ``_coalesce``: fold sites into matching runs (site id -> run id into ``into``).
+
+    Returns the sites without a matching run. Candidates are selected first, then updated
+    while still in ``statuses``; the UPDATE takes the write lock, so the re-select that
+    follows sees exactly the runs it changed (an executor may claim one in between).
+    """
+    wanted = {site.id: (site.plugin_key, site.plugin_config) for site in sites}
+    matches: Dict[int, int] = {}
+    candidates = session.exec(
+        select(Run.id, Run.site_id, Run.plugin_key, Run.plugin_config)
+        .where(Run.site_id.in_(list(wanted)), Run.status.in_(statuses))
+        .order_by(Run.id)
+    ).all()
+    for run_id, site_id, plugin_key, plugin_config in candidates:
+        if site_id not in matches and wanted[site_id] == (plugin_key, plugin_config):
+            matches[site_id] = run_id
+    if matches:
+        values = {"coalesced_count": Run.coalesced_count + 1, "priority": func.min(Run.priority, priority), "not_before": None}
+        if force:
+            values["force"] = True
+        session.execute(
+            update(Run)
+            .where(Run.id.in_(list(matches.values())), Run.status.in_(statuses))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        # an executor may have claimed some of them between the select and the update
+        still = set(session.exec(select(Run.id).where(Run.id.in_(list(matches.values())), Run.status.in_(statuses))).all())
+        matches = {site_id: run_id for site_id, run_id in matches.items() if run_id in still}
+        into.update(matches)
+    return [site for site in sites if site.id not in matches]
+
+
+def _drop_oldest(session: Session, count: int, keep: Iterable[int] = ()) -> List[int]:
+    statement = select(Run.id).where(Run.status == QUEUED_STATUS).order_by(Run.id).limit(count)
+    keep = list(keep)
+    if keep:
+        statement = statement.where(Run.id.not_in(keep))
+    run_ids = list(session.exec(statement).all())
+    if run_ids:
+        session.execute(
+            update(Run)
+            .where(Run.id.in_(run_ids), Run.status == QUEUED_STATUS)
+            .values(status=SKIPPED_STATUS, error=DROPPED_ERROR, finished_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    return run_ids
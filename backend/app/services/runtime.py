@@ -0,0 +1,59 @@
+"""Background roles shared by the API process and the standalone worker."""
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlmodel import Session
+
+from app.core.config import get_settings
+from app.db.session import engine
+from app.services.archive import ARCHIVE_JOB_ID, run_archiver
+from app.services.artifacts import ARTIFACT_GC_JOB_ID, run_artifact_gc
+from app.services.catchup import catch_up_missed_runs
+from app.services.dispatcher import start_dispatcher, stop_dispatcher
+from app.services.hooks import log_event
+from app.services.jobs import register_site_jobs
+from app.services.leader import start_elector, stop_elector
+from app.services.scheduler import get_scheduler, start_scheduler, stop_scheduler, tick_message
+
+ROLE_SCHEDULER = "scheduler"
+ROLE_EXECUTOR = "executor"
+ROLE_BOTH = "both"
+ROLES = (ROLE_SCHEDULER, ROLE_EXECUTOR, ROLE_BOTH)
+
+
+def on_tick() -> None:
+    # The tick only does bookkeeping; runs are executed by the dispatcher's workers so a
+    # slow plugin never delays cron fires or the next tick.
+    with Session(engine) as session:
+        log_event(session, tick_message(), level="debug", event="scheduler.tick")
+        register_site_jobs(get_scheduler(), session)
+
+
+def lead() -> None:
+    """Take over scheduling after winning the scheduler lease."""
+    with Session(engine) as session:
+        catch_up_missed_runs(session)
+    scheduler = start_scheduler(on_tick)
+    if get_settings().archive_after_days > 0:
+        scheduler.add_job(run_archiver, "interval", hours=1, id=ARCHIVE_JOB_ID, replace_existing=True)
+    scheduler.add_job(run_artifact_gc, "interval", hours=1, id=ARTIFACT_GC_JOB_ID, replace_existing=True)
+
+
+def start_roles(scheduler: bool, execution: bool, concurrency: Optional[int] = None) -> None:
+    """Start the cron scheduler and/or the run dispatcher in this process.
+
+    Every scheduler process campaigns for the scheduler lease and only the leader runs cron
+    jobs, reconciliation and catch-up; the others stand by. Executors claim runs atomically
+    and can run in as many processes as needed.
+    """
+    if scheduler:
+        start_elector(engine, on_elected=lead, on_demoted=stop_scheduler)
+    if execution:
+        start_dispatcher(engine, concurrency)
+
+
+def stop_roles() -> None:
+    stop_elector()
+    stop_scheduler()
+    stop_dispatcher()
@@ -0,0 +1,165 @@
+"""Cron parsing and load spreading for site schedules."""
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.cron import CronTrigger
+
+from sqlmodel import Session, select
+
+from app.core.config import get_settings
+from app.db.models import Site
+
+
+def extract_cron(notes: Optional[str]) -> Optional[str]:
+    """Legacy ``cron: <expr>`` line in site notes."""
+    for line in (notes or "").splitlines():
+        line = line.strip()
+        # the prefix is matched case-insensitively ("Cron:" too), so slice rather than split
+        if line.lower().startswith("cron:"):
+            return line[len("cron:"):].strip()
+    return None
+
+
+def normalize_cron(expr: Optional[str]) -> Optional[str]:
+    expr = " ".join((expr or "").split())
+    return expr or None
+
+
+@lru_cache(maxsize=4096)
+def _parse_cron(expr: str) -> CronTrigger:
+    return CronTrigger.from_crontab(expr)
+
+
+def get_cron_trigger(expr: str) -> CronTrigger:
+    """Parsed trigger for a crontab expression, shared by every site using the same one.
+
+    Raises ValueError for invalid expressions (failures are not cached).
+    """
+    return _parse_cron(normalize_cron(expr) or "")
+
+
+def validate_cron_expression(expr: str) -> Optional[str]:
+    if not normalize_cron(expr):
+        return "Cron expression is required"
+    try:
+        get_cron_trigger(expr)
+    except ValueError as exc:
+        return str(exc)
+    return None
+
+
+class OffsetTrigger(BaseTrigger):
+    """Fire ``offset`` seconds after every fire time of the wrapped trigger."""
+
+    def __init__(self, trigger: BaseTrigger, offset: int):
+        self.trigger = trigger
+        self.offset = timedelta(seconds=offset)
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        previous = previous_fire_time - self.offset if previous_fire_time else None
+        next_time = self.trigger.get_next_fire_time(previous, now - self.offset)
+        return next_time + self.offset if next_time else None
+
+    def __str__(self) -> str:
+        return f"{self.trigger} +{int(self.offset.total_seconds())}s"
+
+    def __repr__(self) -> str:
+        return f"<OffsetTrigger ({self.trigger!r}, offset={int(self.offset.total_seconds())})>"
+
+
+def site_host(site: Site) -> str:
+    return (urlparse(site.url or "").hostname or "").lower()
+
+
+def spread_window(site: Site) -> int:
+    """Spread window in minutes for a site (site override, else the global default)."""
+    if site.spread_minutes is not None:
+        return max(site.spread_minutes, 0)
+    return max(get_settings().schedule_spread_minutes, 0)
+
+
+def _stable_hash(value: str) -> int:
+    return int(hashlib.sha1(value.encode("utf-8")).hexdigest()[:12], 16)
+
+
+def _cron_interval_minutes(expr: str) -> Optional[int]:
+    trigger = get_cron_trigger(expr)
+    now = datetime.now(trigger.timezone)
+    first = trigger.get_next_fire_time(None, now)
+    second = trigger.get_next_fire_time(first, first) if first else None
+    if not first or not second:
+        return None
+    return max(int((second - first).total_seconds() // 60), 1)
+
+
+def assign_offsets(sites: Iterable[Site]) -> Dict[int, int]:
+    """Deterministic fire offsets (seconds) per site id.
+
+    Sites sharing a cron expression and spread window are placed into minute buckets of that
+    window: in order of a hash of the site id, each site takes the bucket with the fewest
+    sites of the same host, then the fewest sites overall, then the one closest to its own
+    hash-derived preference. The seconds within the minute also come from the hash. The
+    result only depends on the set of sites, so it is stable across restarts. Windows are
+    clamped to the cron interval so a spread fire never overlaps the next one.
+    """
+    groups: Dict[Tuple[str, int], List[Site]] = defaultdict(list)
+    for site in sites:
+        expr = normalize_cron(site.cron)
+        window = spread_window(site)
+        if expr and window > 0:
+            groups[(expr, window)].append(site)
+
+    offsets: Dict[int, int] = {}
+    for (expr, window), members in groups.items():
+        try:
+            interval = _cron_interval_minutes(expr)
+        except ValueError:
+            continue
+        buckets = min(window, interval) if interval else window
+        load = [0] * buckets
+        host_load: Dict[str, List[int]] = defaultdict(lambda: [0] * buckets)
+        for site in sorted(members, key=lambda item: (_stable_hash(str(item.id)), item.id)):
+            digest = _stable_hash(str(site.id))
+            preferred = digest % buckets
+            per_host = host_load[site_host(site)]
+            bucket = min(
+                range(buckets),
+                key=lambda b: (per_host[b], load[b], (b - preferred) % buckets),
+            )
+            load[bucket] += 1
+            per_host[bucket] += 1
+            offsets[site.id] = bucket * 60 + (digest // buckets) % 60
+    return offsets
+
+
+def site_trigger(site: Site, offset: int = 0) -> BaseTrigger:
+    trigger = get_cron_trigger(site.cron or "")
+    return OffsetTrigger(trigger, offset) if offset else trigger
+
+
+def affected_sites(
+    session: Session,
+    changed: Dict[int, Optional[Site]],
+    previous_crons: Iterable[str],
+) -> Tuple[Dict[int, Optional[Site]], Dict[int, int]]:
+    """Sites whose schedule may change after ``changed`` sites were written, with offsets.
+
+    Spread offsets depend on every enabled site sharing a cron, so this returns the full cron
+    groups the changed sites left (``previous_crons``) and joined, plus the changed sites
+    themselves (``None`` for deleted ones).
+    """
+    crons = set(previous_crons)
+    crons.update(normalize_cron(site.cron) for site in changed.values() if site and site.cron)
+    group = list(
+        session.exec(select(Site).where(Site.enabled == True, Site.cron.in_(crons)))  # noqa: E712
+    ) if crons else []
+    sites: Dict[int, Optional[Site]] = {site.id: site for site in group}
+    sites.update(changed)
+    return sites, assign_offsets(group)
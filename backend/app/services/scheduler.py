@@ -1,15 +1,110 @@
 """Scheduler helpers."""
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
 
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+)
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.job import Job
 
+TICK_SECONDS = 10
+TICK_JOB_ID = "tick"
+
 _scheduler: Optional[BackgroundScheduler] = None
 
 
+class TickMetrics:
+    """Scheduler health collected from APScheduler events.
+
+    Lag is how late a job was submitted relative to its scheduled time; skipped ticks
+    are fires dropped because the previous tick was still running (max_instances).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.ticks = 0
+        self.skipped_ticks = 0
+        self.missed_ticks = 0
+        self.tick_errors = 0
+        self.last_tick_at: Optional[datetime] = None
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.avg_lag_ms = 0.0
+        self.last_duration_ms = 0.0
+        self.max_duration_ms = 0.0
+        self.cron_fires = 0
+        self.cron_max_lag_ms = 0.0
+        self.cron_skipped = 0
+        self.cron_missed = 0
+        self._submitted: Dict[str, datetime] = {}
+
+    def on_event(self, event) -> None:
+        now = datetime.now(timezone.utc)
+        is_tick = event.job_id == TICK_JOB_ID
+        with self._lock:
+            if event.code == EVENT_JOB_SUBMITTED:
+                lag = max((now - event.scheduled_run_times[-1]).total_seconds() * 1000, 0.0)
+                self._submitted[event.job_id] = now
+                if is_tick:
+                    self.ticks += 1
+                    self.last_tick_at = now
+                    self.last_lag_ms = lag
+                    self.max_lag_ms = max(self.max_lag_ms, lag)
+                    # exponential moving average over roughly the last 20 ticks
+                    self.avg_lag_ms = lag if self.ticks == 1 else self.avg_lag_ms * 0.95 + lag * 0.05
+                else:
+                    self.cron_fires += 1
+                    self.cron_max_lag_ms = max(self.cron_max_lag_ms, lag)
+            elif event.code in (EVENT_JOB_EXECUTED, EVENT_JOB_ERROR):
+                submitted = self._submitted.pop(event.job_id, None)
+                if is_tick:
+                    if submitted:
+                        self.last_duration_ms = (now - submitted).total_seconds() * 1000
+                        self.max_duration_ms = max(self.max_duration_ms, self.last_duration_ms)
+                    if event.code == EVENT_JOB_ERROR:
+                        self.tick_errors += 1
+            elif event.code == EVENT_JOB_MAX_INSTANCES:
+                if is_tick:
+                    self.skipped_ticks += 1
+                else:
+                    self.cron_skipped += 1
+            elif event.code == EVENT_JOB_MISSED:
+                if is_tick:
+                    self.missed_ticks += 1
+                else:
+                    self.cron_missed += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "interval_seconds": TICK_SECONDS,
+                "ticks": self.ticks,
+                "skipped_ticks": self.skipped_ticks,
+                "missed_ticks": self.missed_ticks,
+                "tick_errors": self.tick_errors,
+                "last_tick_at": self.last_tick_at,
+                "last_lag_ms": round(self.last_lag_ms, 1),
+                "avg_lag_ms": round(self.avg_lag_ms, 1),
+                "max_lag_ms": round(self.max_lag_ms, 1),
+                "last_duration_ms": round(self.last_duration_ms, 1),
+                "max_duration_ms": round(self.max_duration_ms, 1),
+                "cron_fires": self.cron_fires,
+                "cron_max_lag_ms": round(self.cron_max_lag_ms, 1),
+                "cron_skipped": self.cron_skipped,
+                "cron_missed": self.cron_missed,
+            }
+
+
+tick_metrics = TickMetrics()
+
 
 def get_scheduler() -> Optional[BackgroundScheduler]:
     return _scheduler
@@ -21,7 +116,11 @@ def start_scheduler(on_tick) -> Optional[BackgroundScheduler]:
     if _scheduler is not None:
         return _scheduler
     scheduler = BackgroundScheduler()
-    scheduler.add_job(on_tick, "interval", seconds=10, id="tick")
+    scheduler.add_listener(
+        tick_metrics.on_event,
+        EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED,
+    )
+    scheduler.add_job(on_tick, "interval", seconds=TICK_SECONDS, id=TICK_JOB_ID)
     scheduler.start()
     _scheduler = scheduler
     return scheduler
@@ -0,0 +1,46 @@
+"""Site change feed.
+
+Every site create/update/delete appends a SiteChange row in the same transaction, so
+consumers (cron reconciliation) can process only what changed since the id they last saw.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+
+from app.db.models import SiteChange
+
+
+def record_site_change(session: Session, site_id: int) -> None:
+    """Queue a change event; the caller commits it together with the site write."""
+    session.add(SiteChange(site_id=site_id))
+
+
+def latest_change_id(session: Session) -> int:
+    return session.exec(select(func.max(SiteChange.id))).one() or 0
+
+
+def changes_since(session: Session, change_id: int) -> List[Tuple[int, int]]:
+    """(change id, site id) pairs after ``change_id``, oldest first."""
+    statement = select(SiteChange.id, SiteChange.site_id).where(SiteChange.id > change_id).order_by(SiteChange.id)
+    return list(session.exec(statement).all())
+
+
+def prune_site_changes(session: Session, older_than: timedelta, keep_after: Optional[int] = None) -> None:
+    """Delete old change rows, always keeping the newest one.
+
+    SQLite hands out ``max(id) + 1`` for a plain INTEGER primary key; emptying the table
+    would restart ids at 1 and consumers waiting for ids above their cursor would miss
+    every later change.
+    """
+    statement = delete(SiteChange).where(
+        SiteChange.created_at < datetime.utcnow() - older_than,
+        SiteChange.id < select(func.max(SiteChange.id)).scalar_subquery(),
+    )
+    if keep_after is not None:
+        statement = statement.where(SiteChange.id <= keep_after)
+    session.exec(statement)
+    session.commit()
@@ -0,0 +1,172 @@
+"""Run counters per site and per plugin.
+
+``RunExecutor`` calls ``record_run`` when a run reaches a final state, inside the same
+transaction that stores the state, so the counters never disagree with the committed
+runs. Each update is a single upsert computed by SQLite from the stored row, which keeps
+concurrent executors (threads or processes) from losing increments. ``/stats`` reads one
+row per site and plugin instead of scanning ``run``.
+
+Counters outlive archiving; ``rebuild_stats`` recomputes them from the database and the
+archive segments (``python -m app.services.stats --rebuild``).
+"""
+from __future__ import annotations
+
+import gzip
+import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import case, delete, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+
+from app.db.models import ArchivedRun, Run, RunStats, Site
+from app.services.executor import FAILED_STATUS, SKIPPED_STATUS, SUCCESS_STATUS
+
+SCOPE_SITE = "site"
+SCOPE_PLUGIN = "plugin"
+FINAL_STATUSES = (SUCCESS_STATUS, FAILED_STATUS, SKIPPED_STATUS)
+
+# histogram column -> upper bound in seconds (None: unbounded)
+DURATION_BUCKETS: "OrderedDict[str, Optional[float]]" = OrderedDict(
+    (("le_1s", 1.0), ("le_5s", 5.0), ("le_30s", 30.0), ("le_2m", 120.0), ("le_10m", 600.0), ("gt_10m", None))
+)
+COUNTER_COLUMNS = ("success", "failed", "skipped", "duration_count", "duration_total_ms") + tuple(DURATION_BUCKETS)
+
+
+def _bucket(seconds: float) -> str:
+    for column, bound in DURATION_BUCKETS.items():
+        if bound is None or seconds <= bound:
+            return column
+    return "gt_10m"
+
+
+def _increments(run: Run) -> Dict[str, object]:
+    """Column values of a stats row holding only ``run``."""
+    finished_at = run.finished_at or datetime.utcnow()
+    values: Dict[str, object] = {column: 0 for column in COUNTER_COLUMNS}
+    values.update(total=1, last_run_at=finished_at, last_success_at=None, last_failure_at=None)
+    if run.status == SUCCESS_STATUS:
+        values.update(success=1, streak=1, best_streak=1, last_success_at=finished_at)
+    elif run.status == FAILED_STATUS:
+        values.update(failed=1, streak=-1, best_streak=0, last_failure_at=finished_at)
+    else:
+        values.update(skipped=1, streak=0, best_streak=0)
+    # skipped runs never reach the plugin; their duration says nothing
+    if run.status != SKIPPED_STATUS and run.started_at and run.finished_at:
+        seconds = max((run.finished_at - run.started_at).total_seconds(), 0.0)
+        values.update(duration_count=1, duration_total_ms=seconds * 1000)
+        values[_bucket(seconds)] = 1
+    return values
+
+
+def _upsert(session: Session, scope: str, key: str, run: Run) -> None:
+    values = _increments(run)
+    statement = insert(RunStats).values(scope=scope, key=key, **values)
+    stored = RunStats.__table__.c
+    new = statement.excluded
+    if run.status == SUCCESS_STATUS:
+        streak = case((stored.streak > 0, stored.streak + 1), else_=1)
+        best_streak = func.max(stored.best_streak, streak)
+    elif run.status == FAILED_STATUS:
+        streak = case((stored.streak < 0, stored.streak - 1), else_=-1)
+        best_streak = stored.best_streak
+    else:
+        streak = stored.streak
+        best_streak = stored.best_streak
+    changes = {column: stored[column] + new[column] for column in COUNTER_COLUMNS}
+    changes.update(
+        total=stored.total + 1,
+        streak=streak,
+        best_streak=best_streak,
+        last_run_at=new.last_run_at,
+        last_success_at=func.coalesce(new.last_success_at, stored.last_success_at),
+        last_failure_at=func.coalesce(new.last_failure_at, stored.last_failure_at),
+    )
+    session.execute(statement.on_conflict_do_update(index_elements=["scope", "key"], set_=changes))
+
+
+def record_run(session: Session, run: Run, site_plugin_key: Optional[str] = None) -> None:
+    """Count a run that reached a final state; the caller commits."""
+    if run.status not in FINAL_STATUSES:
+        return
+    _upsert(session, SCOPE_SITE, str(run.site_id), run)
+    # not queue_flow: it falls back to a per-site flow name for sites without a plugin
+    plugin_key = run.plugin_key or site_plugin_key
+    if plugin_key is None:
+        site = session.get(Site, run.site_id)
+        plugin_key = site.plugin_key if site else None
+    if plugin_key:
+        _upsert(session, SCOPE_PLUGIN, plugin_key, run)
+
+
+def _archived_runs(session: Session) -> Iterator[Run]:
+    # one pass per segment member; members whose index rows were never written are skipped
+    from app.services.archive import segment_path
+
+    members = session.exec(
+        select(ArchivedRun.segment, ArchivedRun.offset, ArchivedRun.length)
+        .distinct()
+        .order_by(ArchivedRun.segment, ArchivedRun.offset)
+    ).all()
+    for segment, offset, length in members:
+        try:
+            with open(segment_path(segment), "rb") as handle:
+                handle.seek(offset)
+                data = gzip.decompress(handle.read(length))
+        except (OSError, EOFError):
+            continue
+        for line in data.decode("utf-8").splitlines():
+            if line:
+                yield Run.model_validate(json.loads(line)["run"])
+
+
+def rebuild_stats(session: Session, batch_size: int = 1000) -> Dict[str, int]:
+    """Recompute every counter from archived and stored runs in one transaction."""
+    plugin_keys = dict(session.exec(select(Site.id, Site.plugin_key)).all())
+    session.execute(delete(RunStats))
+    counted = {"archived": 0, "runs": 0}
+
+    def count(run: Run, source: str) -> None:
+        if run.status in FINAL_STATUSES:
+            record_run(session, run, plugin_keys.get(run.site_id))
+            counted[source] += 1
+
+    for run in _archived_runs(session):
+        count(run, "archived")
+    # explicit columns: this also runs as a migration, before later columns exist
+    columns = (Run.id, Run.site_id, Run.status, Run.started_at, Run.finished_at, Run.plugin_key)
+    last: Tuple[datetime, int] = (datetime.min, 0)
+    while True:
+        # keyset pagination in finish order keeps streaks right and memory flat
+        rows = session.exec(
+            select(*columns)
+            .where(Run.status.in_(FINAL_STATUSES), Run.finished_at != None)  # noqa: E711
+            .where((Run.finished_at > last[0]) | ((Run.finished_at == last[0]) & (Run.id > last[1])))
+            .order_by(Run.finished_at, Run.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            count(Run(**row._asdict()), "runs")
+        last = (rows[-1].finished_at, rows[-1].id)
+    session.commit()
+    return counted
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.db.session import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Run statistics maintenance.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all counters from run history")
+    args = parser.parse_args()
+    init_db()
+    with Session(engine) as session:
+        if args.rebuild:
+            print(rebuild_stats(session))
+        for row in session.exec(select(RunStats).order_by(RunStats.scope, RunStats.key)):
+            print(row.scope, row.key, row.total, row.success, row.failed, row.skipped, row.streak)
@@ -0,0 +1,212 @@
+"""Next-fire-time index over all site schedules.
+
+The index keeps one heap entry per scheduled site holding its next fire time (after load
+spreading). Queries copy the heap and pop fires in time order, so a window costs
+O((sites + fires) log sites) instead of iterating every trigger from the client. Site
+writes are picked up from the site change feed on each ``refresh``.
+"""
+from __future__ import annotations
+
+import heapq
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from apscheduler.triggers.base import BaseTrigger
+from sqlmodel import Session, select
+
+from app.db.models import Site
+from app.services.schedule import (
+    affected_sites,
+    assign_offsets,
+    get_cron_trigger,
+    normalize_cron,
+    site_host,
+    site_trigger,
+)
+from app.services.site_changes import changes_since, latest_change_id
+
+_TICK = timedelta(microseconds=1)
+
+
+@dataclass
+class ScheduleEntry:
+    site_id: int
+    name: str
+    host: str
+    cron: str
+    offset: int
+    trigger: BaseTrigger
+    version: int
+
+
+class ScheduleIndex:
+    def __init__(self) -> None:
+        self.entries: Dict[int, ScheduleEntry] = {}
+        self.last_change_id: Optional[int] = None
+        # (next fire time, site id, entry version); stale versions are skipped lazily
+        self._heap: List[Tuple[datetime, int, int]] = []
+        self._cursor = datetime.now(timezone.utc)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, session: Session) -> None:
+        """Apply site changes since the last refresh and advance the heap to now."""
+        with self._lock:
+            if self.last_change_id is None:
+                self.last_change_id = latest_change_id(session)
+                sites = list(session.exec(select(Site).where(Site.enabled == True)))  # noqa: E712
+                self.entries = {}
+                self._heap = []
+                self._cursor = datetime.now(timezone.utc)
+                offsets = assign_offsets(sites)
+                for site in sites:
+                    self._set(site.id, site, offsets.get(site.id, 0))
+                return
+
+            changes = changes_since(session, self.last_change_id)
+            if changes:
+                self.last_change_id = changes[-1][0]
+                changed = {site_id: session.get(Site, site_id) for _, site_id in changes}
+                previous = [self.entries[site_id].cron for site_id in changed if site_id in self.entries]
+                sites, offsets = affected_sites(session, changed, previous)
+                for site_id, site in sites.items():
+                    self._set(site_id, site, offsets.get(site_id, 0))
+            self._advance(datetime.now(timezone.utc))
+
+    def fires(self, start: datetime, end: datetime) -> Iterator[Tuple[datetime, ScheduleEntry]]:
+        """Yield (fire time, entry) for every fire in [start, end], in time order."""
+        with self._lock:
+            entries = dict(self.entries)
+            if start >= self._cursor:
+                heap = [item for item in self._heap if self._live(item, entries)]
+                heapq.heapify(heap)
+            else:
+                heap = []
+                for entry in entries.values():
+                    fire = entry.trigger.get_next_fire_time(None, start)
+                    if fire:
+                        heap.append((fire, entry.site_id, entry.version))
+                heapq.heapify(heap)
+
+        # Sites sharing a cron only differ by their offset, so each cron fire is computed once.
+        successors: Dict[Tuple[str, datetime], Optional[datetime]] = {}
+        while heap and heap[0][0] <= end:
+            fire, site_id, version = heapq.heappop(heap)
+            entry = entries[site_id]
+            if fire < start:
+                # jump straight to the window instead of walking every earlier fire
+                following = entry.trigger.get_next_fire_time(None, start)
+            else:
+                yield fire, entry
+                following = self._following(entry, fire, successors)
+            if following:
+                heapq.heappush(heap, (following, site_id, version))
+
+    def histogram(self, start: datetime, end: datetime, bucket_minutes: int = 1) -> Dict[str, object]:
+        """Fire counts per time bucket plus the busiest bucket per host."""
+        bucket_minutes = max(bucket_minutes, 1)
+        bucket_seconds = bucket_minutes * 60
+        counts: Dict[int, int] = defaultdict(int)
+        host_counts: Dict[Tuple[str, int], int] = defaultdict(int)
+        total = 0
+        for fire, entry in self.fires(start, end):
+            key = int(fire.timestamp()) // bucket_seconds
+            counts[key] += 1
+            host_counts[(entry.host, key)] += 1
+            total += 1
+
+        buckets = [
+            {"start": datetime.fromtimestamp(key * bucket_seconds, start.tzinfo), "count": count}
+            for key, count in sorted(counts.items())
+        ]
+        host_peaks: Dict[str, int] = {}
+        for (host, _), count in host_counts.items():
+            host_peaks[host] = max(host_peaks.get(host, 0), count)
+        return {
+            "start": start,
+            "end": end,
+            "bucket_minutes": bucket_minutes,
+            "total": total,
+            "peak": max(buckets, key=lambda item: item["count"]) if buckets else None,
+            "buckets": buckets,
+            "host_peaks": host_peaks,
+        }
+
+    def _set(self, site_id: int, site: Optional[Site], offset: int) -> None:
+        cron_expr = normalize_cron(site.cron) if site and site.enabled else None
+        current = self.entries.get(site_id)
+        if not cron_expr:
+            self.entries.pop(site_id, None)
+            return
+        if current and current.cron == cron_expr and current.offset == offset:
+            current.name = site.name
+            current.host = site_host(site)
+            return
+        try:
+            trigger = site_trigger(site, offset)
+        except ValueError:
+            self.entries.pop(site_id, None)
+            return
+        self._version += 1
+        entry = ScheduleEntry(
+            site_id=site_id,
+            name=site.name,
+            host=site_host(site),
+            cron=cron_expr,
+            offset=offset,
+            trigger=trigger,
+            version=self._version,
+        )
+        self.entries[site_id] = entry
+        fire = trigger.get_next_fire_time(None, self._cursor)
+        if fire:
+            heapq.heappush(self._heap, (fire, site_id, entry.version))
+
+    def _advance(self, now: datetime) -> None:
+        heap = self._heap
+        while heap and (heap[0][0] < now or not self._live(heap[0], self.entries)):
+            fire, site_id, version = heapq.heappop(heap)
+            if not self._live((fire, site_id, version), self.entries):
+                continue
+            following = self.entries[site_id].trigger.get_next_fire_time(None, now)
+            if following:
+                heapq.heappush(heap, (following, site_id, version))
+        self._cursor = now
+        if len(heap) > 2 * len(self.entries) + 64:
+            self._heap = [item for item in heap if self._live(item, self.entries)]
+            heapq.heapify(self._heap)
+
+    @staticmethod
+    def _following(
+        entry: ScheduleEntry,
+        fire: datetime,
+        successors: Dict[Tuple[str, datetime], Optional[datetime]],
+    ) -> Optional[datetime]:
+        offset = timedelta(seconds=entry.offset)
+        base = fire - offset
+        key = (entry.cron, base)
+        if key not in successors:
+            successors[key] = get_cron_trigger(entry.cron).get_next_fire_time(base, base + _TICK)
+        following = successors[key]
+        return following + offset if following else None
+
+    @staticmethod
+    def _live(item: Tuple[datetime, int, int], entries: Dict[int, ScheduleEntry]) -> bool:
+        entry = entries.get(item[1])
+        return entry is not None and entry.version == item[2]
+
+
+_index: Optional[ScheduleIndex] = None
+
+
+def get_schedule_index(session: Optional[Session] = None) -> ScheduleIndex:
+    """Process-wide index, refreshed from the change feed when a session is given."""
+    global _index
+    if _index is None:
+        _index = ScheduleIndex()
+    if session is not None:
+        _index.refresh(session)
+    return _index
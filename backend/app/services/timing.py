@@ -0,0 +1,102 @@
+"""Per-run phase timing and resource accounting."""
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+PHASES = ("queue_wait", "cookie_sync", "inject", "before_run", "run", "after_run", "db_commit")
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+class RunTimer:
+    """Accumulates wall time per phase for one run.
+
+    ``cpu_ms`` is charged by the executor for the time the run is the active one on its
+    thread. ``rss_kb`` is the growth of the process peak RSS while the run was active; it is
+    process-wide, so concurrent runs share the attribution.
+    """
+
+    def __init__(self, created_at: Optional[datetime] = None, started_at: Optional[datetime] = None):
+        self.phases: Dict[str, float] = {}
+        self.cpu_ms = 0.0
+        self._rss_start = _peak_rss_kb()
+        if created_at and started_at:
+            self.phases["queue_wait"] = max((started_at - created_at).total_seconds() * 1000, 0.0)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name: str, wall_ms: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + wall_ms
+
+    def summary(self) -> Dict[str, float]:
+        data = {name: round(value, 1) for name, value in self.phases.items()}
+        data["cpu"] = round(self.cpu_ms, 1)
+        rss_end = _peak_rss_kb()
+        if self._rss_start is not None and rss_end is not None:
+            data["rss_kb"] = max(rss_end - self._rss_start, 0)
+        return data
+
+    def dump(self) -> str:
+        return json.dumps(self.summary(), separators=(",", ":"))
+
+
+def load_timings(raw: Optional[str]) -> Optional[Dict[str, float]]:
+    if not raw:
+        return None
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    index = min(int(round(pct * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def aggregate_timings(rows: Iterable[Optional[str]]) -> Dict[str, object]:
+    """Per-phase count/avg/p50/p95/max/total (ms) over serialized run timings."""
+    samples: Dict[str, List[float]] = {}
+    count = 0
+    for raw in rows:
+        data = load_timings(raw)
+        if not data:
+            continue
+        count += 1
+        for name, value in data.items():
+            if isinstance(value, (int, float)):
+                samples.setdefault(name, []).append(float(value))
+    phases = {}
+    for name, values in samples.items():
+        values.sort()
+        total = sum(values)
+        phases[name] = {
+            "count": len(values),
+            "avg": round(total / len(values), 1),
+            "p50": round(_percentile(values, 0.5), 1),
+            "p95": round(_percentile(values, 0.95), 1),
+            "max": round(values[-1], 1),
+            "total": round(total, 1),
+        }
+    return {"runs": count, "phases": phases}
@@ -0,0 +1,176 @@
+"""Streaming export and import of table rows.
+
+Exports page through a table by primary key (``id > last ORDER BY id LIMIT n``), one short
+read per batch on the async read engine, and encode each batch as NDJSON or CSV before
+fetching the next; with ``gzip`` the bytes go through one streaming compressor. Memory
+stays at one batch whatever the table size, and no read transaction is held open for the
+length of a download.
+
+Imports read the request body chunk by chunk (gzip is detected from the magic bytes) and
+yield one parsed row at a time.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.services.result_data import load_result_data
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+BATCH_SIZE = 1000
+# columns holding JSON text: decoded in NDJSON exports and CSV imports (run.result_data,
+# possibly compressed, is decoded in NDJSON and kept as stored in CSV)
+JSON_COLUMNS = {"plugin_config", "retry_policy", "payload", "timings"}
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def export_stream(
+    engine: AsyncEngine, name: str, table, fmt: str, gzip: bool, where: Iterable = ()
+) -> Tuple[AsyncIterator[bytes], str, Dict[str, str]]:
+    """Body, media type and headers for a streaming download of ``table``."""
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}{'.gz' if gzip else ''}"
+    media_type = "application/gzip" if gzip else MEDIA_TYPES[fmt]
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return stream_table(engine, table, fmt, gzip, where), media_type, headers
+
+
+def _value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _ndjson(rows: Sequence[Dict[str, Any]]) -> str:
+    lines = []
+    for row in rows:
+        data = {}
+        for key, value in row.items():
+            if key == "result_data":
+                value = load_result_data(value)
+            elif key in JSON_COLUMNS and isinstance(value, str):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            data[key] = _value(value)
+        lines.append(json.dumps(data, separators=(",", ":"), ensure_ascii=False) + "\n")
+    return "".join(lines)
+
+
+def _csv(rows: Sequence[Dict[str, Any]], columns: Sequence[str], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow(["" if row[column] is None else _value(row[column]) for column in columns])
+    return buffer.getvalue()
+
+
+async def stream_table(
+    engine: AsyncEngine,
+    table,
+    fmt: str = "ndjson",
+    gzip: bool = False,
+    where: Iterable = (),
+    batch_size: int = BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Encoded rows of ``table`` (an integer ``id`` primary key) matching ``where``."""
+    columns = [column.name for column in table.columns]
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    conditions = list(where)
+    last_id = 0
+    first = True
+    while True:
+        statement = select(table).where(table.c.id > last_id, *conditions).order_by(table.c.id).limit(batch_size)
+        async with engine.connect() as conn:
+            rows = [dict(row._mapping) for row in await conn.execute(statement)]
+        if fmt == "csv":
+            text = _csv(rows, columns, header=first)
+        else:
+            text = _ndjson(rows)
+        first = False
+        if text:
+            data = text.encode("utf-8")
+            data = compressor.compress(data) if compressor else data
+            if data:
+                yield data
+        if len(rows) < batch_size:
+            break
+        last_id = rows[-1]["id"]
+    if compressor:
+        yield compressor.flush()
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Text lines (with their line ending) from raw, possibly gzipped, body chunks."""
+    decompressor = None
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    started = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if not started:
+            started = True
+            if chunk[:2] == GZIP_MAGIC:
+                decompressor = zlib.decompressobj(47)
+        pending += decoder.decode(decompressor.decompress(chunk) if decompressor else chunk)
+        # "\n" only: str.splitlines() also breaks on U+2028, U+0085 and other separators that
+        # NDJSON exports write unescaped inside strings
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    if decompressor:
+        pending += decoder.decode(decompressor.flush())
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """``(row number, record, error)`` per input row; exactly one of record and error is set.
+
+    CSV cells that are empty are left out (so model defaults apply) and JSON columns are
+    decoded. A malformed CSV stream ends with an error row since it cannot be resynced.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        number = 0
+        try:
+            for row in reader:
+                number += 1
+                record: Dict[str, Any] = {}
+                try:
+                    for key, value in row.items():
+                        if key is None or value in (None, ""):
+                            continue
+                        record[key] = json.loads(value) if key in JSON_COLUMNS else value
+                except ValueError as exc:
+                    yield number, None, f"invalid JSON in column {key}: {exc}"
+                    continue
+                yield number, record, None
+        except csv.Error as exc:
+            yield number + 1, None, f"malformed CSV: {exc}"
+        return
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f"invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "expected a JSON object"
+            continue
+        yield number, record, None
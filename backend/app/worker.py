@@ -0,0 +1,69 @@
+"""Standalone worker: runs the scheduler and/or run executors outside the API process.
+
+    python -m app.worker --role scheduler   # cron fires, job reconciliation, catch-up
+    python -m app.worker --role executor    # executes queued runs
+    python -m app.worker                    # both
+
+Start the API with ``SCHEDULER_ENABLED=false`` / ``EXECUTION_ENABLED=false`` for the roles a
+worker takes over. Run a single scheduler; executors can be scaled out freely.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import threading
+
+from sqlmodel import Session
+
+from app.db.session import engine, init_db
+from app.plugins.loader import load_configured_plugins
+from app.services.hooks import log_event
+from app.services.runtime import ROLE_BOTH, ROLE_EXECUTOR, ROLE_SCHEDULER, ROLES, start_roles, stop_roles
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description=__doc__.splitlines()[0])
+    parser.add_argument("--role", choices=ROLES, default=os.getenv("WORKER_ROLE", ROLE_BOTH))
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="executor threads (defaults to EXECUTOR_CONCURRENCY)",
+    )
+    args = parser.parse_args(argv)
+
+    init_db()
+    load_configured_plugins()
+    scheduler = args.role in (ROLE_SCHEDULER, ROLE_BOTH)
+    execution = args.role in (ROLE_EXECUTOR, ROLE_BOTH)
+
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    start_roles(scheduler=scheduler, execution=execution, concurrency=args.concurrency)
+    with Session(engine) as session:
+        log_event(
+            session,
+            f"Worker {os.getpid()} started ({args.role})",
+            level="info",
+            event="worker.started",
+            payload={"pid": os.getpid(), "role": args.role},
+        )
+    try:
+        stopping.wait()
+    finally:
+        stop_roles()
+        with Session(engine) as session:
+            log_event(
+                session,
+                f"Worker {os.getpid()} stopped ({args.role})",
+                level="info",
+                event="worker.stopped",
+                payload={"pid": os.getpid(), "role": args.role},
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Read-route latency under many concurrent clients.
+
+Starts the API with uvicorn on a seeded temporary database (scheduler and executors off),
+opens ``--streams`` SSE log streams, and has ``--clients`` concurrent clients loop over the
+read routes for ``--seconds``. Prints requests/s and latency percentiles per route; run it
+on two commits to compare.
+
+    cd backend
+    python -m benchmarks.api_latency --clients 200 --streams 20 --seconds 15
+
+``httpx`` (installed with FastAPI's test client) drives the load. The load generator needs
+CPU of its own: on a small machine point ``--url`` at a server started elsewhere (seeded
+with matching ``--sites``/``--runs``) instead of sharing cores with it.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _seed(database_url: str, sites: int, runs: int, logs_per_run: int) -> None:
+    script = f"""
+import sys
+sys.path.insert(0, {BACKEND_DIR!r})
+from sqlmodel import Session
+from app.db.session import engine, init_db
+from app.db.models import LogEntry, Run, Site
+init_db()
+with Session(engine) as session:
+    session.add_all(Site(name=f"site {{i}}", url=f"https://site{{i}}.example") for i in range({sites}))
+    session.commit()
+    session.add_all(Run(site_id=i % {sites} + 1, status="success") for i in range({runs}))
+    session.commit()
+    session.add_all(
+        LogEntry(run_id=run_id, message=f"run {{run_id}} step {{step}}")
+        for run_id in range(1, {runs} + 1)
+        for step in range({logs_per_run})
+    )
+    session.commit()
+"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=BACKEND_DIR, env=env)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def _client(base: str, routes, deadline: float, latencies: Dict[str, List[float]], errors: Dict[str, int]):
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        while time.perf_counter() < deadline:
+            name, path = random.choice(routes)()
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                ok = response.status_code < 500
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies[name].append(time.perf_counter() - started)
+            else:
+                errors[name] += 1
+
+
+async def _stream(base: str, since_id: int, deadline: float, events: List[int]):
+    async with httpx.AsyncClient(base_url=base, timeout=None) as client:
+        try:
+            async with client.stream("GET", "/api/v1/logs/stream", params={"poll_interval": 0.2, "since_id": since_id}) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data:"):
+                        events[0] += 1
+                    if time.perf_counter() >= deadline:
+                        return
+        except httpx.HTTPError:
+            return
+
+
+async def _load(base: str, clients: int, streams: int, seconds: float, sites: int, runs: int, logs: int):
+    routes = [
+        lambda: ("GET /runs/{id}", f"/api/v1/runs/{random.randint(1, runs)}"),
+        lambda: ("GET /logs?run_id", f"/api/v1/logs/?run_id={random.randint(1, runs)}"),
+        lambda: ("GET /sites/{id}", f"/api/v1/sites/{random.randint(1, sites)}"),
+        lambda: ("GET /runs?site_id", f"/api/v1/runs/?site_id={random.randint(1, sites)}"),
+        lambda: ("GET /health", "/api/v1/health"),
+    ]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    events = [0]
+    deadline = time.perf_counter() + seconds
+    tasks = [_stream(base, logs, deadline, events) for _ in range(streams)]
+    tasks += [_client(base, routes, deadline, latencies, errors) for _ in range(clients)]
+    await asyncio.gather(*tasks)
+    return latencies, errors, events[0]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--sites", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=5000)
+    parser.add_argument("--logs-per-run", type=int, default=5)
+    parser.add_argument("--url", help="benchmark a running server instead of starting one")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        base = args.url.rstrip("/")
+        latest = httpx.get(f"{base}/api/v1/logs/", params={"limit": 1}, timeout=10).json()
+        latencies, errors, events = asyncio.run(
+            _load(base, args.clients, args.streams, args.seconds, args.sites, args.runs, latest[-1]["id"] if latest else 0)
+        )
+        _report(args, latencies, errors, events)
+        return
+
+    directory = tempfile.mkdtemp(prefix="signflow-latency-")
+    database_url = f"sqlite:///{directory}/bench.db"
+    _seed(database_url, args.sites, args.runs, args.logs_per_run)
+
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        SCHEDULER_ENABLED="false",
+        EXECUTION_ENABLED="false",
+        API_TOKEN="",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base}/api/v1/health", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        latencies, errors, events = asyncio.run(
+            _load(base, args.clients, args.streams, args.seconds, args.sites, args.runs, args.runs * args.logs_per_run)
+        )
+    finally:
+        server.terminate()
+        server.wait(10)
+    _report(args, latencies, errors, events)
+
+
+def _report(args, latencies: Dict[str, List[float]], errors: Dict[str, int], events: int) -> None:
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.clients} clients, {args.streams} SSE streams, {args.seconds:g}s: {total / args.seconds:.0f} req/s, {events} SSE events")
+    print(f"{'route':<20}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}")
+    for name in sorted(latencies):
+        values = latencies[name]
+        print(
+            f"{name:<20}{len(values) / args.seconds:>8.0f}"
+            f"{_percentile(values, 0.5) * 1000:>9.1f}{_percentile(values, 0.95) * 1000:>9.1f}"
+            f"{_percentile(values, 0.99) * 1000:>9.1f}{max(values) * 1000:>9.1f}{errors.get(name, 0):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
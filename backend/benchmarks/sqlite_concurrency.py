@@ -0,0 +1,159 @@
+"""Concurrent read/write throughput of the SQLite profiles.
+
+Reader threads run the log-list query the API and SSE poller issue; writer threads append
+log rows and flip run statuses the way executors do. Each profile gets a fresh database.
+
+    cd backend
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 4 --seconds 10
+
+``default`` is the engine the app used before the tuning profile (plain ``create_engine``,
+rollback journal); ``tuned`` is ``create_db_engine`` with the configured pragmas and a
+separate read-only pool.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import update
+from sqlmodel import Session, SQLModel, create_engine, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import get_settings  # noqa: E402
+from app.db.engine import create_db_engine  # noqa: E402
+from app.db.models import LogEntry, Run, Site  # noqa: E402
+
+
+def _engines(profile: str, url: str):
+    if profile == "default":
+        engine = create_engine(url)
+        return engine, engine
+    settings = get_settings()
+    return create_db_engine(url, settings), create_db_engine(url, settings, read_only=True)
+
+
+def _seed(engine, rows: int) -> List[int]:
+    with Session(engine) as session:
+        site = Site(name="bench", url="https://example.com")
+        session.add(site)
+        session.commit()
+        runs = [Run(site_id=site.id, status="queued") for _ in range(100)]
+        session.add_all(runs)
+        session.commit()
+        run_ids = [run.id for run in runs]
+        session.add_all(LogEntry(run_id=run_ids[i % 100], message=f"seed {i}") for i in range(rows))
+        session.commit()
+    return run_ids
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_profile(profile: str, readers: int, writers: int, seconds: float, seed_rows: int) -> Dict[str, float]:
+    directory = tempfile.mkdtemp(prefix=f"signflow-bench-{profile}-")
+    url = f"sqlite:///{directory}/bench.db"
+    engine, read_engine = _engines(profile, url)
+    SQLModel.metadata.create_all(engine)
+    run_ids = _seed(engine, seed_rows)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+    read_latency: List[float] = []
+    write_latency: List[float] = []
+
+    def reader() -> None:
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with Session(read_engine) as session:
+                    session.exec(select(LogEntry).order_by(LogEntry.id.desc()).limit(200)).all()
+                    session.exec(select(Run).where(Run.status == "queued").limit(50)).all()
+            except Exception:  # noqa: BLE001 - "database is locked" is what we are measuring
+                with lock:
+                    stats["read_errors"] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                stats["reads"] += 1
+                read_latency.append(elapsed)
+
+    def writer(index: int) -> None:
+        count = 0
+        while not stop.is_set():
+            run_id = run_ids[(index * 7 + count) % len(run_ids)]
+            count += 1
+            started = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    session.add(LogEntry(run_id=run_id, message=f"writer {index} #{count}"))
+                    session.execute(
+                        update(Run)
+                        .where(Run.id == run_id)
+                        .values(status="running" if count % 2 else "queued", started_at=datetime.utcnow())
+                    )
+                    session.commit()
+            except Exception:  # noqa: BLE001
+                with lock:
+                    stats["write_errors"] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                stats["writes"] += 1
+                write_latency.append(elapsed)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    read_engine.dispose()
+
+    return {
+        "reads_per_s": stats["reads"] / seconds,
+        "writes_per_s": stats["writes"] / seconds,
+        "read_errors": stats["read_errors"],
+        "write_errors": stats["write_errors"],
+        "read_p95_ms": _percentile(read_latency, 0.95) * 1000,
+        "write_p95_ms": _percentile(write_latency, 0.95) * 1000,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--seed-rows", type=int, default=20000)
+    parser.add_argument("--profile", choices=("default", "tuned", "both"), default="both")
+    args = parser.parse_args(argv)
+
+    profiles = ("default", "tuned") if args.profile == "both" else (args.profile,)
+    results = {}
+    for profile in profiles:
+        results[profile] = run_profile(profile, args.readers, args.writers, args.seconds, args.seed_rows)
+
+    columns = ("reads_per_s", "writes_per_s", "read_p95_ms", "write_p95_ms", "read_errors", "write_errors")
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s")
+    print(f"{'profile':<10}" + "".join(f"{column:>14}" for column in columns))
+    for profile, result in results.items():
+        print(f"{profile:<10}" + "".join(f"{result[column]:>14.1f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()